@@ -1,7 +1,53 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
-from lbsolver import solve_puzzle, DEFAULT_PUZZLE
+from lbsolver import solve_puzzle_detailed, solve_puzzle_page, normalize_puzzle, profile_solve, iter_solve_batch, solve_flights, LOG_LEVEL, iter_solve_events, get_dictionary, get_engine, dictionary_ready, ENGINES, DEFAULT_ENGINE, DEFAULT_PUZZLE
+import lbjobs
+import lbstats
+import gc
+import json
+import logging
 import os
+import select
+import socket
+import time
+
+# The solver logs one line per solve at INFO (LBSOLVER_LOG_LEVEL sets the level)
+logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+# Load the dictionary once, at import time. Under `gunicorn --preload` this runs
+# in the master process and the forked workers share the pages copy-on-write;
+# freezing the GC keeps collections from touching (and copying) those objects.
+get_dictionary().prepare()
+gc.freeze()
+
+# Upper bound on any solve, kept under gunicorn's default 30 s worker timeout so a
+# slow puzzle returns its best solutions so far instead of getting the worker killed
+MAX_DEADLINE_MS = int(os.environ.get('LBSOLVER_MAX_DEADLINE_MS', 25000))
+
+# Most puzzles accepted by one /solve/batch request
+MAX_BATCH = int(os.environ.get('LBSOLVER_BATCH_MAX', 1000))
+
+# Solutions per page of a ranked /solve request ("limit"), by default and at most
+DEFAULT_PAGE = 10
+MAX_PAGE = int(os.environ.get('LBSOLVER_PAGE_MAX', 100))
+
+# Engines a request may pick. The parallel engine starts a process pool per
+# search, which a threaded worker must not fork (nor a small instance afford per
+# request), so it is left to the CLI; /solve/batch runs it as dfs
+WEB_ENGINES = tuple(engine for engine in ENGINES if engine != 'parallel')
+
+# Whether /solve may be asked to profile a solve ("profile": 1); off by default
+# since a profiled search runs several times slower
+ALLOW_PROFILING = os.environ.get('LBSOLVER_PROFILING', '') not in ('', '0')
+
+# Solves submitted with "async": true run here, in the background of this worker
+jobs = lbjobs.queue_from_environment(solve_puzzle_detailed)
+lbstats.REGISTRY.gauge('lbsolver_jobs_queued', 'Background jobs waiting for a worker',
+                       function=lambda: jobs.stats()['queued'])
+lbstats.REGISTRY.gauge('lbsolver_jobs_running', 'Background jobs being solved',
+                       function=lambda: jobs.stats()['running'])
+lbstats.REGISTRY.counter('lbsolver_jobs_rejected_total', 'Background jobs turned away by a full queue',
+                         function=lambda: jobs.rejected)
 
 app = Flask(__name__, static_folder='static', static_url_path='')
 CORS(app)  # Enable CORS for all routes
@@ -17,24 +63,258 @@ def add_security_headers(response):
 def index():
     return render_template('index.html', default_puzzle=DEFAULT_PUZZLE)
 
+@app.route('/healthz')
+def healthz():
+    if not dictionary_ready():
+        return jsonify({'ready': False}), 503
+    dictionary = get_dictionary()
+    return jsonify({
+        'ready': True,
+        'words': len(dictionary),
+        'load_seconds': round(dictionary.load_seconds, 3),
+        'single_flight': solve_flights.stats()
+    })
+
+@app.route('/metrics')
+def metrics():
+    return Response(lbstats.REGISTRY.render(), mimetype=None, content_type=lbstats.CONTENT_TYPE)
+
 @app.route('/static/<path:filename>')
 def serve_static(filename):
     return send_from_directory('static', filename)
 
+def client_disconnected(environ):
+    """Return a check for whether the client has closed its connection.
+
+    Only gunicorn exposes the socket; elsewhere the check always says no. A
+    closed connection reads as end-of-file, which MSG_PEEK sees without
+    consuming anything.
+    """
+    sock = environ.get('gunicorn.socket')
+
+    def check():
+        if sock is None:
+            return False
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b''
+        except (OSError, ValueError):
+            return True
+
+    return check
+
+def solve_options(data):
+    """Read the search budget of a solve request (see lbsolver.SearchBudget)."""
+    deadline_ms = data.get('deadline_ms')
+    return {
+        'deadline_ms': min(float(deadline_ms), MAX_DEADLINE_MS) if deadline_ms is not None else MAX_DEADLINE_MS,
+        'max_nodes': int(data['max_nodes']) if data.get('max_nodes') is not None else None,
+        'max_solutions': int(data['max_solutions']) if data.get('max_solutions') is not None else None,
+    }
+
+def web_engine(engine):
+    """Return engine if a request may use it (see WEB_ENGINES), else raise ValueError."""
+    get_engine(engine)
+    if engine not in WEB_ENGINES:
+        raise ValueError(f"The '{engine}' engine can't be used here. Choose one of: {', '.join(WEB_ENGINES)}")
+    return engine
+
 @app.route('/solve', methods=['POST'])
 def solve():
     puzzle = request.json.get('puzzle', DEFAULT_PUZZLE)
+    if request.json.get('async'):
+        return submit_job(puzzle)
+    if request.json.get('profile') or request.args.get('profile') not in (None, '', '0'):
+        return solve_profiled(puzzle)
+    if request.json.get('limit') is not None or request.json.get('cursor'):
+        return solve_page(puzzle)
     try:
-        solutions = solve_puzzle(puzzle)
+        result = solve_puzzle_detailed(puzzle, web_engine(request.json.get('engine', DEFAULT_ENGINE)),
+                                       should_stop=client_disconnected(request.environ),
+                                       **solve_options(request.json))
         return jsonify({
             'success': True,
-            'solutions': solutions
+            'solutions': result['solutions'],
+            'status': result['status'],
+            'stopped': result['stopped']
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+def solve_page(puzzle):
+    """Answer one page of all the solutions, best first (see lbsolver.solve_puzzle_page)."""
+    try:
+        limit = request.json.get('limit')
+        limit = int(limit) if limit is not None else DEFAULT_PAGE
+        if limit > MAX_PAGE:
+            raise ValueError(f"limit must be at most {MAX_PAGE}")
+        result = solve_puzzle_page(puzzle, limit, request.json.get('cursor'),
+                                   deadline_ms=solve_options(request.json)['deadline_ms'],
+                                   should_stop=client_disconnected(request.environ))
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    return jsonify({
+        'success': True,
+        'solutions': result['solutions'],
+        'next_cursor': result['next_cursor'],
+        'status': result['status'],
+        'stopped': result['stopped']
+    })
+
+def solve_profiled(puzzle):
+    """Solve under the profiler and include its report in the response."""
+    if not ALLOW_PROFILING:
+        return jsonify({
+            'success': False,
+            'error': 'Profiling is disabled (set LBSOLVER_PROFILING=1 to enable it)'
+        }), 403
+    try:
+        result = profile_solve(puzzle, web_engine(request.json.get('engine', DEFAULT_ENGINE)),
+                               deadline_ms=solve_options(request.json)['deadline_ms'])
+    except RuntimeError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 409
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    return jsonify({
+        'success': True,
+        'solutions': result['solutions'],
+        'status': result['status'],
+        'stopped': result['stopped'],
+        'profile': result['profile']
+    })
+
+def submit_job(puzzle):
+    """Queue a solve and answer at once with its job ID (poll /jobs/<id>)."""
+    engine = request.json.get('engine', DEFAULT_ENGINE)
+    try:
+        web_engine(engine)
+        puzzle = normalize_puzzle(puzzle)
+        options = solve_options(request.json)
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    try:
+        job = jobs.submit(puzzle, engine, **options)
+    except lbjobs.QueueFull as e:
+        response = jsonify({
+            'success': False,
+            'error': f'Too many solves in progress, try again shortly ({e})'
         })
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    response = jsonify({
+        'success': True,
+        'job': job.id,
+        'status': job.status
+    })
+    response.headers['Location'] = f'/jobs/{job.id}'
+    return response, 202
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown or expired job'
+        }), 404
+    return jsonify(dict(job.to_dict(), success=True))
+
+@app.route('/solve/batch', methods=['POST'])
+def solve_batch():
+    """Solve a list of puzzles in one request (see lbsolver.iter_solve_batch).
+
+    Answers with every puzzle's result, in input order, or with "stream": true
+    as NDJSON lines ({"index": i, ...}) in completion order followed by a
+    "finished" line. deadline_ms bounds the whole batch.
+    """
+    puzzles = request.json.get('puzzles')
+    engine = request.json.get('engine', DEFAULT_ENGINE)
+    try:
+        if not isinstance(puzzles, list):
+            raise ValueError("'puzzles' must be a list of puzzles")
+        if len(puzzles) > MAX_BATCH:
+            raise ValueError(f"At most {MAX_BATCH} puzzles can be solved in one batch")
+        get_engine(engine)
+        deadline_ms = solve_options(request.json)['deadline_ms']
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    start = time.perf_counter()
+    results = iter_solve_batch(puzzles, engine, deadline_ms)
+    if request.json.get('stream'):
+        def generate():
+            try:
+                for indices, result in results:
+                    for index in indices:
+                        yield json.dumps(dict(result, index=index, puzzle=puzzles[index])) + '\n'
+                yield json.dumps({'type': 'finished', 'puzzles': len(puzzles),
+                                  'seconds': time.perf_counter() - start}) + '\n'
+            except Exception as e:
+                yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    ordered = [None] * len(puzzles)
+    try:
+        for indices, result in results:
+            for index in indices:
+                ordered[index] = dict(result, puzzle=puzzles[index])
     except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    return jsonify({
+        'success': True,
+        'results': ordered,
+        'seconds': time.perf_counter() - start
+    })
+
+@app.route('/solve/stream', methods=['POST'])
+def solve_stream():
+    """Stream solver events (see lbsolver.iter_solve_events) as NDJSON, one per line.
+
+    If the client goes away the server closes the generator, which ends the search.
+    """
+    puzzle = request.json.get('puzzle', DEFAULT_PUZZLE)
+    engine = request.json.get('engine', DEFAULT_ENGINE)
+    try:
+        web_engine(engine)
+        puzzle = normalize_puzzle(puzzle)
+        options = solve_options(request.json)
+    except (TypeError, ValueError) as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 400
+    should_stop = client_disconnected(request.environ)
+
+    def generate():
+        try:
+            for event in iter_solve_events(puzzle, engine, should_stop=should_stop, **options):
+                yield json.dumps(event) + '\n'
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 if __name__ == '__main__':
     # Ensure the static and templates directories exist
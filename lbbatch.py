@@ -0,0 +1,145 @@
+"""Solve many puzzles without prompts, over a pool of worker processes.
+
+    python lbbatch.py puzzles.txt > solutions.ndjson
+    cat puzzles.ndjson | python lbbatch.py --workers 4 --unordered
+
+Input lines are either plain puzzles ("LEI XYS CUV KOT") or JSON objects with a
+"puzzle" list and an optional "id"; blank lines and lines starting with # are
+skipped. Each result is written as one JSON line as soon as it is ready, in input
+order or (with --unordered) in completion order. Throughput is reported on
+stderr at the end.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+import lbsolver
+
+
+def parse_line(line):
+    """Return (id, puzzle) for an input line, or None for a blank or comment line."""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        data = json.loads(line)
+        puzzle = data['puzzle']
+        if not isinstance(puzzle, list) or not all(isinstance(side, str) for side in puzzle):
+            raise ValueError("'puzzle' must be a list of sides, e.g. [\"LEI\", \"XYS\", \"CUV\", \"KOT\"]")
+        return data.get('id'), [side.upper() for side in puzzle]
+    return None, line.upper().split()
+
+
+def _init_worker(log_level):
+    lbsolver.logger.setLevel(log_level)
+    lbsolver.get_dictionary().prepare()  # Once per worker (a no-op if inherited from the parent)
+
+
+def _solve(puzzle, engine, use_cache, deadline_ms):
+    try:
+        result = lbsolver.solve_puzzle_detailed(puzzle, engine, use_cache=use_cache, deadline_ms=deadline_ms)
+    except Exception as e:
+        return {'error': str(e)}
+    return {key: result[key] for key in ('solutions', 'status', 'stopped', 'nodes', 'cached')}
+
+
+def solve_batch(lines, output, workers=None, engine=lbsolver.DEFAULT_ENGINE, ordered=True,
+                use_cache=True, deadline_ms=None):
+    """Solve the puzzles in lines, writing a JSON line per puzzle to output.
+
+    At most a few puzzles per worker are in flight at once, so the input is read
+    as it is consumed. Returns (puzzles solved, errors), each puzzle or unreadable
+    line counting once.
+    """
+    lbsolver.get_dictionary().prepare()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(lbsolver.logger.getEffectiveLevel(),)) as pool:
+        window = workers * 4
+        pending = deque()  # (line number, id, puzzle, future), in input order
+        count = errors = 0
+
+        def write(number, puzzle_id, puzzle, result):
+            nonlocal count, errors
+            record = {'line': number, 'puzzle': puzzle}
+            if puzzle_id is not None:
+                record['id'] = puzzle_id
+            record.update(result)
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+            if 'error' in result:
+                errors += 1
+            else:
+                count += 1
+
+        def drain(block):
+            if ordered:
+                while pending and (pending[0][3].done() or block):
+                    number, puzzle_id, puzzle, future = pending.popleft()
+                    write(number, puzzle_id, puzzle, future.result())
+                    block = False
+            else:
+                done = wait([item[3] for item in pending], timeout=None if block else 0,
+                            return_when=FIRST_COMPLETED).done
+                for item in [item for item in pending if item[3] in done]:
+                    pending.remove(item)
+                    write(item[0], item[1], item[2], item[3].result())
+
+        for number, line in enumerate(lines, 1):
+            try:
+                parsed = parse_line(line)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # Queued like a solve so that it is written in order
+                future = Future()
+                future.set_result({'error': f"Unreadable line: {e}"})
+                pending.append((number, None, None, future))
+                continue
+            if parsed is None:
+                continue
+            puzzle_id, puzzle = parsed
+            pending.append((number, puzzle_id, puzzle,
+                            pool.submit(_solve, puzzle, engine, use_cache, deadline_ms)))
+            drain(block=len(pending) >= window)
+        while pending:
+            drain(block=True)
+    return count, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('input', nargs='?', help='File of puzzles (default: stdin)')
+    parser.add_argument('--output', '-o', help='Write results to this file (default: stdout)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--engine', choices=sorted(lbsolver.ENGINES), default=lbsolver.DEFAULT_ENGINE)
+    parser.add_argument('--unordered', action='store_true', help='Write results as they complete')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the solution cache and store')
+    parser.add_argument('--deadline-ms', type=float, help='Time budget per puzzle')
+    parser.add_argument('--log-level', default='WARNING', type=str.upper,
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help='Level of the solver log messages')
+    args = parser.parse_args(argv)
+    lbsolver.logger.setLevel(args.log_level)
+
+    source = open(args.input) if args.input else sys.stdin
+    output = open(args.output, 'w') if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        count, errors = solve_batch(source, output, args.workers, args.engine, not args.unordered,
+                                    not args.no_cache, args.deadline_ms)
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            output.close()
+    seconds = time.perf_counter() - start
+    print(f"Solved {count} puzzles ({errors} errors) in {seconds:.2f} s: "
+          f"{(count + errors) / seconds if seconds else 0:.1f} puzzles/s", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
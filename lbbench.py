@@ -0,0 +1,177 @@
+"""Benchmark the solver over the example puzzles and seeded random boards.
+
+    python lbbench.py --random 20 --output bench.json
+    python lbbench.py --random 20 --baseline bench.json
+
+Each puzzle is solved (without the cache) --repeat times; the fastest run's
+phase timings are kept along with its node counts, the peak memory traced during
+one extra run and the quality of the solutions (word count, redundancy). With
+--baseline the results are compared against an earlier --output file and the
+exit status is 1 if any puzzle regressed beyond the thresholds.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import lbsolver
+
+# Relative frequency of each letter in English text (percent)
+LETTER_FREQUENCIES = {
+    'A': 8.2, 'B': 1.5, 'C': 2.8, 'D': 4.3, 'E': 12.7, 'F': 2.2, 'G': 2.0, 'H': 6.1, 'I': 7.0,
+    'J': 0.15, 'K': 0.77, 'L': 4.0, 'M': 2.4, 'N': 6.7, 'O': 7.5, 'P': 1.9, 'Q': 0.095, 'R': 6.0,
+    'S': 6.3, 'T': 9.1, 'U': 2.8, 'V': 0.98, 'W': 2.4, 'X': 0.15, 'Y': 2.0, 'Z': 0.074,
+}
+VOWELS = set("AEIOU")
+
+
+def random_puzzle(rng, min_vowels=3):
+    """Draw 12 distinct letters weighted by LETTER_FREQUENCIES into four sides of three."""
+    while True:
+        letters = []
+        weights = dict(LETTER_FREQUENCIES)
+        while len(letters) < 12:
+            letter = rng.choices(list(weights), list(weights.values()))[0]
+            letters.append(letter)
+            del weights[letter]
+        if sum(letter in VOWELS for letter in letters) >= min_vowels:
+            rng.shuffle(letters)
+            return [''.join(letters[i:i + 3]) for i in range(0, 12, 3)]
+
+
+def random_puzzles(count, seed):
+    rng = random.Random(seed)
+    return [random_puzzle(rng) for _ in range(count)]
+
+
+def bench_puzzle(puzzle, engine, repeat=3, memory=True):
+    """Solve puzzle repeat times and return its measurements."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = lbsolver.solve_puzzle_detailed(puzzle, engine, use_cache=False)
+        runs.append((time.perf_counter() - start, result))
+    seconds, result = min(runs, key=lambda run: run[0])
+
+    peak_bytes = None
+    if memory:
+        tracemalloc.start()
+        lbsolver.solve_puzzle_detailed(puzzle, engine, use_cache=False)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    stats = result['stats']
+    chains = [solution['words'] for solution in result['solutions']]
+    return {
+        'puzzle': ' '.join(puzzle),
+        'seconds': seconds,
+        'median_seconds': statistics.median(run[0] for run in runs),
+        'phases': stats['phases'],
+        'nodes': stats['nodes'],
+        'pruned': stats['pruned'],
+        'candidates': stats['candidates'],
+        'peak_bytes': peak_bytes,
+        'status': result['status'],
+        'solutions': len(chains),
+        'words': len(chains[0]) if chains else None,
+        'redundancy': min(lbsolver.calculate_redundancy(chain) for chain in chains) if chains else None,
+        'best': chains[0] if chains else None,
+    }
+
+
+def run_benchmark(puzzles, engine=lbsolver.DEFAULT_ENGINE, repeat=3, memory=True, seed=None):
+    lbsolver.get_dictionary().prepare()
+    results = []
+    for puzzle in puzzles:
+        results.append(bench_puzzle(puzzle, engine, repeat, memory))
+        print(f"{results[-1]['puzzle']}: {results[-1]['seconds'] * 1000:.1f} ms, "
+              f"{results[-1]['nodes']} nodes, {results[-1]['words']} words", file=sys.stderr)
+    total = sum(result['seconds'] for result in results)
+    return {
+        'meta': {
+            'engine': engine,
+            'repeat': repeat,
+            'seed': seed,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'summary': {
+            'puzzles': len(results),
+            'seconds': total,
+            'nodes': sum(result['nodes'] for result in results),
+            'peak_bytes': max((result['peak_bytes'] or 0 for result in results), default=0),
+            'unsolved': sum(result['words'] is None for result in results),
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold=0.2, min_seconds=0.005):
+    """Return a description of every regression of report against baseline.
+
+    A puzzle regresses when it is more than threshold (relative) and min_seconds
+    (absolute) slower, searches more than threshold more nodes, or finds worse
+    solutions (more words or more redundancy).
+    """
+    previous = {result['puzzle']: result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = previous.get(result['puzzle'])
+        if old is None:
+            continue
+        name = result['puzzle']
+        if (result['seconds'] > old['seconds'] * (1 + threshold)
+                and result['seconds'] - old['seconds'] > min_seconds):
+            regressions.append(f"{name}: {old['seconds'] * 1000:.1f} ms -> {result['seconds'] * 1000:.1f} ms")
+        if result['nodes'] > old['nodes'] * (1 + threshold):
+            regressions.append(f"{name}: {old['nodes']} nodes -> {result['nodes']} nodes")
+        if old['words'] is not None and (result['words'] is None or result['words'] > old['words']):
+            regressions.append(f"{name}: {old['words']} words -> {result['words']} words")
+        elif (result['words'] is not None and result['words'] == old['words']
+              and result['redundancy'] > old['redundancy']):
+            regressions.append(f"{name}: redundancy {old['redundancy']} -> {result['redundancy']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--engine', choices=sorted(lbsolver.ENGINES), default=lbsolver.DEFAULT_ENGINE)
+    parser.add_argument('--random', type=int, default=0, metavar='N', help='Also solve N random boards')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the random boards')
+    parser.add_argument('--no-examples', action='store_true', help='Skip the example puzzles')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per puzzle (the fastest is kept)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the traced-memory run')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against the results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown counted as a regression')
+    args = parser.parse_args(argv)
+
+    puzzles = [] if args.no_examples else list(lbsolver.EXAMPLE_PUZZLES)
+    puzzles += random_puzzles(args.random, args.seed)
+    report = run_benchmark(puzzles, args.engine, args.repeat, not args.no_memory, args.seed)
+    summary = report['summary']
+    print(f"{summary['puzzles']} puzzles in {summary['seconds']:.3f} s, {summary['nodes']} nodes, "
+          f"peak {summary['peak_bytes'] / 1e6:.1f} MB, {summary['unsolved']} unsolved")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
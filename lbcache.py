@@ -0,0 +1,251 @@
+"""Caching of solved puzzles."""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def solutions_size(solutions):
+    """Approximate memory used by a list of formatted solutions, in bytes."""
+    size = sys.getsizeof(solutions)
+    for solution in solutions:
+        size += sys.getsizeof(solution) + sys.getsizeof(solution['words']) + sys.getsizeof(solution['score'])
+        size += sum(sys.getsizeof(word) for word in solution['words'])
+    return size
+
+
+def copy_solutions(solutions):
+    """Copy formatted solutions so that callers can't modify a cached entry."""
+    return [dict(solution, words=list(solution['words'])) for solution in solutions]
+
+
+class SolutionCache:
+    """A thread-safe LRU cache of formatted solutions with a TTL and a memory cap.
+
+    Entries are evicted least recently used first once either max_entries or
+    max_bytes (as estimated by solutions_size) would be exceeded.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024, ttl=24 * 60 * 60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()  # key -> (expiry time, size, solutions)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return a copy of the cached solutions for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            solutions = entry[2]
+        return copy_solutions(solutions)
+
+    def put(self, key, solutions):
+        solutions = copy_solutions(solutions)
+        size = solutions_size(solutions)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, solutions)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one.
+
+    The first caller for a key (the leader) runs the function; callers arriving
+    while it runs (followers) wait for its result instead of repeating the work.
+    leaders counts the calls that ran, followers the calls that were saved, and
+    max_fan_in the most callers that ever shared one flight.
+
+    Flights are per process: only callers on threads of the same process (e.g.
+    a worker's background job threads) share one. Other processes run their own.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.followers = 0
+        self.max_fan_in = 0
+        self._flights = {}  # key -> [done event, callers, result, exception]
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """Return (function's result, whether it was shared from another caller)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = [threading.Event(), 1, None, None]
+                self.leaders += 1
+            else:
+                flight[1] += 1
+                self.followers += 1
+            self.max_fan_in = max(self.max_fan_in, flight[1])
+
+        if not leader:
+            flight[0].wait()
+            if flight[3] is not None:
+                raise flight[3]
+            return flight[2], True
+
+        try:
+            flight[2] = function()
+        except Exception as e:
+            flight[3] = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight[0].set()
+        return flight[2], False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'leaders': self.leaders,
+                'followers': self.followers,
+                'max_fan_in': self.max_fan_in,
+            }
+
+
+def cache_from_environment():
+    """Build a SolutionCache configured by the LBSOLVER_CACHE_* environment variables."""
+    return SolutionCache(
+        max_entries=int(os.environ.get('LBSOLVER_CACHE_ENTRIES', 1024)),
+        max_bytes=int(os.environ.get('LBSOLVER_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+        ttl=float(os.environ.get('LBSOLVER_CACHE_TTL', 24 * 60 * 60)),
+    )
+
+
+class SolutionStore:
+    """Formatted solutions persisted in SQLite, shared by every process on the host.
+
+    Rows record the engine version and the dictionary hash they were computed
+    with; a row that doesn't match the running solver is treated as missing.
+    The database runs in WAL mode so readers in other gunicorn workers don't
+    block on writers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Connections can't cross a fork, so each worker opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions ("
+                " puzzle TEXT NOT NULL,"
+                " engine TEXT NOT NULL,"
+                " engine_version INTEGER NOT NULL,"
+                " dictionary_hash TEXT NOT NULL,"
+                " solutions TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " PRIMARY KEY (puzzle, engine))")
+            connection.commit()
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, puzzle, engine, engine_version, dictionary_hash):
+        """Return the stored solutions for a canonical puzzle, or None.
+
+        The store is only an optimization, so database errors count as misses.
+        """
+        with self._lock:
+            try:
+                row = self._connect().execute(
+                    "SELECT solutions FROM solutions WHERE puzzle = ? AND engine = ?"
+                    " AND engine_version = ? AND dictionary_hash = ?",
+                    ('|'.join(puzzle), engine, engine_version, dictionary_hash)).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, puzzle, engine, engine_version, dictionary_hash, solutions):
+        with self._lock:
+            try:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?)",
+                    ('|'.join(puzzle), engine, engine_version, dictionary_hash,
+                     json.dumps(solutions), time.time()))
+                connection.commit()
+            except sqlite3.Error:
+                pass  # e.g. a read-only disk; the solutions are still returned
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def store_from_environment():
+    """Open the SolutionStore at LBSOLVER_STORE (default solutions.db); an empty
+    value disables the store."""
+    path = os.environ.get('LBSOLVER_STORE', 'solutions.db')
+    return SolutionStore(path) if path else None
@@ -0,0 +1,258 @@
+"""Binary dictionary index.
+
+restrict.py compiles the word list into this format and lbsolver.py memory-maps
+it at startup, so a worker never parses the text dictionary or keeps a Python
+string per word. The file is a fixed header followed by native-endian columns:
+
+    offsets      uint32[n + 1]  start of each word in the buffer
+    masks        uint32[n]      26-bit letter mask (bit 0 = A)
+    complexity   float32[n]     word_complexity score (of the version in the header)
+    letter_ids   uint32[27]     start of each letter's postings
+    postings     uint32[p]      ids of the words containing each letter, A to Z
+    trie_first   uint32[t]      first child of each trie node (children are contiguous)
+    trie_words   int32[t]       id of the word ending at each trie node, or -1
+    first        uint8[n]       first letter (0 = A)
+    last         uint8[n]       last letter (0 = A)
+    trie_counts  uint8[t]       number of children of each trie node
+    trie_letters uint8[t]       letter on the edge into each trie node (0 = A)
+    buffer       bytes          all words, concatenated
+
+Trie node 0 is the root and the children of every node are sorted by letter.
+"""
+
+import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+INDEX_NAME = "lbwords.idx"
+INDEX_MAGIC = b"LBIX"
+INDEX_VERSION = 3
+
+# magic, version, little-endian flag, complexity version, word count, buffer
+# size, posting count, trie node count, source size, source mtime (ns), source SHA-1
+HEADER = struct.Struct("<4sIBxHIIIIQQ20s")
+HEADER_SIZE = 64
+
+LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def letter_mask(letters):
+    """Return the 26-bit mask of the letters (A-Z)."""
+    mask = 0
+    for letter in letters:
+        mask |= 1 << (ord(letter) - 65)
+    return mask
+
+
+class Trie:
+    """A letter trie stored as flat columns (see the module docstring)."""
+
+    def __init__(self, first_child, word_ids, counts, letters):
+        self.first_child = first_child
+        self.word_ids = word_ids
+        self.counts = counts
+        self.letters = letters
+
+    def __len__(self):
+        return len(self.counts)
+
+
+def build_trie(words):
+    """Build a Trie over words; word_ids refer to positions in words.
+
+    Nodes are laid out breadth-first. Each node stands for the run of sorted
+    words sharing its prefix, so building it never needs per-node dicts.
+    """
+    order = sorted(range(len(words)), key=words.__getitem__)
+    first_child = array.array('I', [0])
+    word_ids = array.array('i', [-1])
+    counts = array.array('B', [0])
+    letters = array.array('B', [0])
+
+    runs = [(0, len(order), 0)]  # (start, end, depth) in order, per node
+    node = 0
+    while node < len(runs):
+        start, end, depth = runs[node]
+        if start < end and len(words[order[start]]) == depth:
+            start += 1  # The word ending here sorts first; it was recorded with the node
+        first_child[node] = len(runs)
+        i = start
+        while i < end:
+            letter = words[order[i]][depth]
+            j = i + 1
+            while j < end and words[order[j]][depth] == letter:
+                j += 1
+            runs.append((i, j, depth + 1))
+            first_child.append(0)
+            word_ids.append(order[i] if len(words[order[i]]) == depth + 1 else -1)
+            counts.append(0)
+            letters.append(ord(letter) - 65)
+            counts[node] += 1
+            i = j
+        node += 1
+    return Trie(first_child, word_ids, counts, letters)
+
+
+def source_signature(source_path):
+    stat = os.stat(source_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def write_index(words, source_path, index_path=INDEX_NAME, complexity=None, complexity_version=0):
+    """Compile words (read from source_path) into a binary index at index_path.
+
+    complexity scores each word; lbsolver.word_complexity is the usual choice,
+    with lbsolver.COMPLEXITY_VERSION as its complexity_version.
+    """
+    with open(source_path, 'rb') as f:
+        source_hash = hashlib.sha1(f.read()).digest()
+    size, mtime_ns = source_signature(source_path)
+
+    offsets = array.array('I', [0])
+    masks = array.array('I')
+    scores = array.array('f')
+    first = bytearray()
+    last = bytearray()
+    postings = [array.array('I') for _ in range(26)]
+    buffer = bytearray()
+    for i, word in enumerate(words):
+        buffer += word.encode('ascii')
+        offsets.append(len(buffer))
+        mask = letter_mask(word)
+        masks.append(mask)
+        scores.append(complexity(word) if complexity else 0.0)
+        first.append(ord(word[0]) - 65)
+        last.append(ord(word[-1]) - 65)
+        for letter in range(26):
+            if mask >> letter & 1:
+                postings[letter].append(i)
+
+    letter_ids = array.array('I', [0])
+    for ids in postings:
+        letter_ids.append(letter_ids[-1] + len(ids))
+    trie = build_trie(words)
+
+    header = HEADER.pack(INDEX_MAGIC, INDEX_VERSION, LITTLE_ENDIAN, complexity_version, len(masks),
+                         len(buffer), letter_ids[-1], len(trie), size, mtime_ns, source_hash)
+
+    # Write to a temporary file and rename, so a running solver never maps a
+    # half-written index.
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        offsets.tofile(f)
+        masks.tofile(f)
+        scores.tofile(f)
+        letter_ids.tofile(f)
+        for ids in postings:
+            ids.tofile(f)
+        trie.first_child.tofile(f)
+        trie.word_ids.tofile(f)
+        f.write(first)
+        f.write(last)
+        trie.counts.tofile(f)
+        trie.letters.tofile(f)
+        f.write(buffer)
+    os.replace(tmp_path, index_path)
+
+
+def read_header(index_path):
+    """Return the header fields of an index as a dict, or None if it is unreadable."""
+    try:
+        with open(index_path, 'rb') as f:
+            data = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    (magic, version, little_endian, complexity_version, count, buffer_size, posting_count,
+     trie_size, size, mtime_ns, source_hash) = HEADER.unpack(data)
+    if magic != INDEX_MAGIC:
+        return None
+    return {
+        'version': version,
+        'little_endian': bool(little_endian),
+        'complexity_version': complexity_version,
+        'count': count,
+        'buffer_size': buffer_size,
+        'posting_count': posting_count,
+        'trie_size': trie_size,
+        'source_size': size,
+        'source_mtime_ns': mtime_ns,
+        'source_hash': source_hash.hex(),
+    }
+
+
+def index_is_current(index_path, source_path, complexity_version=0):
+    """Check that index_path exists, is readable by this build and matches source_path,
+    with its complexity column scored by complexity_version."""
+    header = read_header(index_path)
+    if header is None or header['version'] != INDEX_VERSION or header['little_endian'] != LITTLE_ENDIAN:
+        return False
+    if header['complexity_version'] != complexity_version:
+        return False
+    try:
+        size, mtime_ns = source_signature(source_path)
+    except OSError:
+        return False
+    return header['source_size'] == size and header['source_mtime_ns'] == mtime_ns
+
+
+class DictionaryIndex:
+    """A memory-mapped binary index. The columns are memoryviews over the file."""
+
+    def __init__(self, index_path):
+        header = read_header(index_path)
+        if header is None or header['version'] != INDEX_VERSION:
+            raise ValueError(f"'{index_path}' is not a version {INDEX_VERSION} dictionary index")
+        if header['little_endian'] != LITTLE_ENDIAN:
+            raise ValueError(f"'{index_path}' was built on a machine with a different byte order")
+
+        with open(index_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        count = header['count']
+        position = HEADER_SIZE
+
+        def take(fmt, length):
+            nonlocal position
+            size = length * struct.calcsize(fmt)
+            section = view[position:position + size]
+            position += size
+            return section.cast(fmt) if fmt != 'B' else section
+
+        self.path = index_path
+        self.source_hash = header['source_hash']
+        self.offsets = take('I', count + 1)
+        self.masks = take('I', count)
+        self.complexity = take('f', count)
+        self.letter_ids = take('I', 27)
+        self.postings = take('I', header['posting_count'])
+        trie_first = take('I', header['trie_size'])
+        trie_words = take('i', header['trie_size'])
+        self.first = take('B', count)
+        self.last = take('B', count)
+        trie_counts = take('B', header['trie_size'])
+        trie_letters = take('B', header['trie_size'])
+        self.buffer = take('B', header['buffer_size'])
+        self.trie = Trie(trie_first, trie_words, trie_counts, trie_letters)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def word(self, i):
+        return str(self.buffer[self.offsets[i]:self.offsets[i + 1]], 'ascii')
+
+    def words(self):
+        """Decode every word (only needed by callers that want the whole list)."""
+        text = str(self.buffer, 'ascii')
+        offsets = self.offsets
+        return [text[offsets[i]:offsets[i + 1]] for i in range(len(self))]
+
+    def ids_with_letter(self, letter):
+        """Return the ids of the words containing letter, in dictionary order."""
+        n = ord(letter) - 65
+        return self.postings[self.letter_ids[n]:self.letter_ids[n + 1]]
@@ -0,0 +1,128 @@
+"""Background solves: a bounded in-process job queue."""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when every worker is busy and the queue is full."""
+
+
+class Job:
+    """One submitted solve. status goes queued -> running -> done (or failed)."""
+
+    def __init__(self, job_id, args, kwargs):
+        self.id = job_id
+        self.args = args
+        self.kwargs = kwargs
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        job = {'id': self.id, 'status': self.status, 'submitted': self.submitted,
+               'started': self.started, 'finished': self.finished}
+        if self.status == 'done':
+            job['result'] = self.result
+        elif self.status == 'failed':
+            job['error'] = self.error
+        return job
+
+
+class JobQueue:
+    """Run calls to solve on a fixed pool of worker threads.
+
+    At most workers jobs run at once and at most max_queued more wait for a
+    worker; submit raises QueueFull beyond that, so a burst is turned away
+    instead of piling up. Finished jobs are kept for keep_seconds so their
+    results can be polled.
+
+    The queue lives in one process: with several gunicorn workers a job can only
+    be polled from the worker that accepted it.
+    """
+
+    def __init__(self, solve, workers=2, max_queued=32, keep_seconds=600):
+        self.solve = solve
+        self.workers = workers
+        self.max_queued = max_queued
+        self.keep_seconds = keep_seconds
+        self.rejected = 0
+        self._jobs = OrderedDict()  # id -> Job, oldest first
+        self._active = 0  # queued or running
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _pool(self):
+        # Threads don't survive a fork, so each process starts its own pool
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='lbjobs')
+            self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, *args, **kwargs):
+        """Queue solve(*args, **kwargs) and return its Job."""
+        with self._lock:
+            self._expire()
+            if self._active >= self.workers + self.max_queued:
+                self.rejected += 1
+                raise QueueFull(f"{self._active} jobs are already queued or running")
+            job = Job(uuid.uuid4().hex, args, kwargs)
+            self._jobs[job.id] = job
+            self._active += 1
+        self._pool().submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job):
+        job.started = time.time()
+        job.status = 'running'
+        try:
+            job.result = self.solve(*job.args, **job.kwargs)
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._active -= 1
+
+    def _expire(self):
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [job.id for job in self._jobs.values()
+                       if job.finished is not None and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                'workers': self.workers,
+                'max_queued': self.max_queued,
+                'queued': statuses.count('queued'),
+                'running': statuses.count('running'),
+                'done': statuses.count('done'),
+                'failed': statuses.count('failed'),
+                'rejected': self.rejected,
+            }
+
+
+def queue_from_environment(solve):
+    """Build a JobQueue configured by the LBSOLVER_JOB_* environment variables."""
+    return JobQueue(
+        solve,
+        workers=int(os.environ.get('LBSOLVER_JOB_WORKERS', 2)),
+        max_queued=int(os.environ.get('LBSOLVER_JOB_QUEUE', 32)),
+        keep_seconds=float(os.environ.get('LBSOLVER_JOB_KEEP', 600)),
+    )
@@ -1,6 +1,36 @@
 #! /usr/local/bin/python3
 
+import atexit
+import base64
+import contextlib
+import functools
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import operator
+import os
+import threading
+import time
+
+import lbcache
+import lbindex
+import lbstats
+
+try:
+    import numpy as np
+except ImportError:  # Without NumPy words are filtered through the trie instead
+    np = None
+
+logger = logging.getLogger("lbsolver")
+
+# Level of the solver's log messages: INFO logs one line per solve, DEBUG every
+# solution and progress report of the search
+LOG_LEVEL = os.environ.get('LBSOLVER_LOG_LEVEL', 'INFO').upper()
+
 DICT_NAME = "lbwords.txt"
+INDEX_NAME = lbindex.INDEX_NAME
 
 # Examples of previous puzzles
 EXAMPLE_PUZZLES = [
@@ -14,6 +44,10 @@ EXAMPLE_PUZZLES = [
 # Default puzzle (will only be used if --use-default is specified)
 DEFAULT_PUZZLE = ["LEI", "XYS", "CUV", "KOT"]
 
+# Ways of selecting the playable words of a puzzle (see Dictionary.playable_words)
+FILTER_MODES = ("vector", "trie", "scan")
+DEFAULT_FILTER_MODE = "vector" if np is not None else "trie"
+
 def load_dict(dict_name):
     with open(dict_name, 'r') as f:
         words = f.readlines()
@@ -21,6 +55,228 @@ def load_dict(dict_name):
     return words
 
 
+class Dictionary:
+    """A word list loaded once and shared, read-only, by every solve in the process.
+
+    When a current binary index (built by restrict.py) is available the words stay
+    in the memory-mapped file and are decoded only as puzzles need them.
+    """
+
+    def __init__(self, name, words, load_seconds, index=None, source_hash=None):
+        self.name = name
+        self.index = index
+        self.load_seconds = load_seconds
+        self.source_hash = source_hash if index is None else index.source_hash
+        self._words = words
+        self._columns = None
+        self._text = None
+        self._trie = None
+
+    @property
+    def words(self):
+        if self._words is None:
+            self._words = tuple(self.index.words())
+        return self._words
+
+    def __len__(self):
+        return len(self.index) if self.index is not None else len(self._words)
+
+    def candidate_words(self, letters):
+        """Return the words that use only the given letters."""
+        if self.index is None:
+            return eliminate_unavailable_letters(self.words, letters)
+        foreign_mask = ((1 << 26) - 1) & ~lbindex.letter_mask(letters)
+        index = self.index
+        return [index.word(i) for i, mask in enumerate(index.masks) if not mask & foreign_mask]
+
+    def prepare(self):
+        """Build the lookup structures used by the solver now rather than on the
+        first request (so that forked workers share them)."""
+        if np is not None:
+            self.columns()
+        if DEFAULT_FILTER_MODE == "trie":
+            self.trie()
+        if self.index is not None and self._text is None:
+            self._text = str(self.index.buffer, 'ascii')
+
+    def word(self, i):
+        return self.index.word(i) if self.index is not None else self.words[i]
+
+    def columns(self):
+        """Return the NumPy columns used for filtering, building them on first use:
+        word offsets into the letter buffer, 26-bit letter masks and the code
+        (first * 26 + second) of every adjacent letter pair in the buffer."""
+        if self._columns is None:
+            if self.index is not None:
+                offsets = np.frombuffer(self.index.offsets, dtype=np.uint32).astype(np.int64)
+                masks = np.frombuffer(self.index.masks, dtype=np.uint32)
+                letters = np.frombuffer(self.index.buffer, dtype=np.uint8) - 65
+            else:
+                letters = np.frombuffer(''.join(self.words).encode('ascii'), dtype=np.uint8) - 65
+                lengths = np.fromiter(map(len, self.words), dtype=np.int64, count=len(self.words))
+                offsets = np.concatenate(([0], np.cumsum(lengths)))
+                masks = np.bitwise_or.reduceat(np.left_shift(np.uint32(1), letters.astype(np.uint32)), offsets[:-1])
+            pairs = letters[:-1].astype(np.uint16) * 26 + letters[1:]
+            self._columns = (offsets, masks, pairs)
+        return self._columns
+
+    def candidate_ids(self, letters):
+        """Return the ids of the words that use only the given letters, as a NumPy array."""
+        _, masks, _ = self.columns()
+        foreign_mask = ((1 << 26) - 1) & ~lbindex.letter_mask(letters)
+        return np.flatnonzero((masks & np.uint32(foreign_mask)) == 0)
+
+    def playable_ids(self, puzzle, ids=None):
+        """Return the ids of the words playable on the puzzle, as a NumPy array.
+
+        Words with a letter outside the puzzle are rejected with one AND over the
+        mask column (unless ids already holds the candidate_ids of its letters),
+        then the adjacent pairs of the remaining words are looked up in a 26x26
+        table of same-side transitions.
+        """
+        offsets, masks, pairs = self.columns()
+        if ids is None:
+            ids = self.candidate_ids(''.join(puzzle))
+
+        # Gather the pair codes of the candidate words: word k owns counts[k]
+        # consecutive entries of pairs starting at starts[k].
+        starts = offsets[ids]
+        counts = offsets[ids + 1] - starts - 1
+        owners = np.repeat(np.arange(len(ids)), counts)
+        positions = np.arange(counts.sum()) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+
+        rejected = np.zeros(len(ids), dtype=bool)
+        rejected[owners[side_conflicts(puzzle)[pairs[positions]]]] = True
+        return ids[~rejected]
+
+    def trie(self):
+        """Return the letter trie of the dictionary (prebuilt in the index, or built on first use)."""
+        if self._trie is None:
+            self._trie = self.index.trie if self.index is not None else lbindex.build_trie(self.words)
+        return self._trie
+
+    def words_for_ids(self, ids):
+        if self.index is None:
+            words = self.words
+            return [words[i] for i in ids]
+        # Slice the words out of the buffer decoded as one string
+        if self._text is None:
+            self._text = str(self.index.buffer, 'ascii')
+        text = self._text
+        offsets = self.index.offsets
+        return [text[offsets[i]:offsets[i + 1]] for i in ids]
+
+    def playable_words(self, puzzle, mode=None):
+        """Return the words that can be played on the puzzle, in dictionary order.
+
+        mode picks the filter: "vector" (NumPy columns), "trie" (walk the letter
+        trie) or "scan" (the pure-Python filters). Defaults to DEFAULT_FILTER_MODE.
+        """
+        mode = mode or DEFAULT_FILTER_MODE
+        if mode == "scan":
+            return eliminate_consecutives(self.candidate_words(''.join(puzzle)), puzzle)
+        return self.words_for_ids(self._playable_ids(puzzle, mode))
+
+    def scored_playable_words(self, puzzle, mode=None):
+        """Return the playable_words of the puzzle and their WordScores."""
+        mode = mode or DEFAULT_FILTER_MODE
+        if mode == "scan":
+            return self.playable_words(puzzle, mode), WordScores()
+        ids = self._playable_ids(puzzle, mode)
+        words = self.words_for_ids(ids)
+        return words, self.word_scores(ids, words)
+
+    def _playable_ids(self, puzzle, mode):
+        if mode == "vector":
+            return self.playable_ids(puzzle).tolist()
+        if mode == "trie":
+            return walk_trie(self.trie(), puzzle)
+        raise ValueError(f"Unknown filter mode '{mode}'. Choose one of: {', '.join(FILTER_MODES)}")
+
+    def word_scores(self, ids, words):
+        """Return the WordScores of the words with the given ids, read from the
+        index's complexity column (computed by restrict.py when it built the
+        index) rather than recomputed. Without an index they start empty."""
+        if self.index is None:
+            return WordScores()
+        complexity = self.index.complexity
+        return WordScores(zip(words, [complexity[i] for i in ids]))
+
+
+def side_conflicts(puzzle):
+    """Return a flat 26x26 table marking the letter pairs that share a side."""
+    table = np.zeros(26 * 26, dtype=bool)
+    for side in puzzle:
+        letters = [ord(letter) - 65 for letter in side]
+        for first in letters:
+            for second in letters:
+                table[first * 26 + second] = True
+    return table
+
+
+def walk_trie(trie, puzzle):
+    """Return the ids (in dictionary order) of the words playable on the puzzle.
+
+    Only the children whose letter is a puzzle letter on a different side from
+    the previous letter are followed, so just the reachable part of the trie is
+    visited.
+    """
+    side_of = [-1] * 26
+    for i, side in enumerate(puzzle):
+        for letter in side:
+            side_of[ord(letter) - 65] = i
+
+    first_child, word_ids, counts, letters = trie.first_child, trie.word_ids, trie.counts, trie.letters
+    ids = []
+    stack = [(0, -1)]  # (node, side of its letter)
+    while stack:
+        node, node_side = stack.pop()
+        start = first_child[node]
+        for child in range(start, start + counts[node]):
+            side = side_of[letters[child]]
+            if side < 0 or side == node_side:
+                continue
+            if word_ids[child] >= 0:
+                ids.append(word_ids[child])
+            if counts[child]:
+                stack.append((child, side))
+    ids.sort()
+    return ids
+
+
+# Process-wide dictionary. Web workers build it at import time (see app.py) so
+# that gunicorn --preload can share one copy across forked workers.
+_dictionary = None
+_dictionary_lock = threading.Lock()
+
+
+def load_dictionary(dict_name=DICT_NAME, index_name=INDEX_NAME):
+    """Load the dictionary, memory-mapping its binary index if it is up to date."""
+    start_time = time.time()
+    if index_name and lbindex.index_is_current(index_name, dict_name, COMPLEXITY_VERSION):
+        index = lbindex.DictionaryIndex(index_name)
+        return Dictionary(dict_name, None, time.time() - start_time, index=index)
+    with open(dict_name, 'rb') as f:
+        source_hash = hashlib.sha1(f.read()).hexdigest()
+    words = tuple(load_dict(dict_name))
+    return Dictionary(dict_name, words, time.time() - start_time, source_hash=source_hash)
+
+
+def get_dictionary(dict_name=DICT_NAME):
+    """Return the process-wide dictionary, loading it on first use."""
+    global _dictionary
+    if _dictionary is None:
+        with _dictionary_lock:
+            if _dictionary is None:
+                _dictionary = load_dictionary(dict_name)
+    return _dictionary
+
+
+def dictionary_ready():
+    """Check whether the process-wide dictionary has been loaded."""
+    return _dictionary is not None
+
+
 def eliminate_consecutives(word_list, puzzle):
     """Eliminate words that contain consecutive letters from the same side of the square."""
     new_list = []
@@ -42,7 +298,7 @@ def eliminate_consecutives(word_list, puzzle):
 
 
 def eliminate_unavailable_letters(word_list, letters):
-    print(f"Eliminating words that contain a letter that's not in puzzle ({letters})")
+    logger.debug("Eliminating words that contain a letter that's not in puzzle (%s)", letters)
     new_list = [word for word in word_list if all(c in letters for c in word)]
     return new_list
 
@@ -82,15 +338,337 @@ def find_all_letters_used(words, all_puzzle_letters):
     return used_letters == set(all_puzzle_letters)
 
 
-def find_chains(valid_words, all_puzzle_letters, max_chain_length=4, prefer_common_words=True):
-    """Find chains of words where the last letter of one word is the first letter of the next."""
-    # Create a dictionary mapping first letters to words
+def letter_bits(all_puzzle_letters):
+    """Assign each puzzle letter its own bit, for integer letter-set masks."""
+    return {letter: 1 << i for i, letter in enumerate(sorted(set(all_puzzle_letters)))}
+
+
+def word_mask(word, bits):
+    """Return the mask of the letters in word (every letter must be in bits)."""
+    mask = 0
+    for letter in word:
+        mask |= bits[letter]
+    return mask
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+# Stored in the dictionary index with the scores it precomputes: bump it whenever
+# word_complexity changes, so that indexes holding the old scores are rebuilt
+COMPLEXITY_VERSION = 1
+
+
+def word_complexity(word):
+    """Heuristic complexity of a word (lower is better - favors shorter, more common words)."""
+    # Length component - longer words are more complex
+    length_score = len(word) * 0.5
+
+    # Letter frequency component - rare letters make words more complex
+    rare_letters = "JQXZVBKWYPGFM"
+    common_letters = "ETAOINSRHLDCU"
+    letter_score = 0
+    for letter in word:
+        if letter in rare_letters:
+            letter_score += 2
+        elif letter not in common_letters:
+            letter_score += 1
+
+    # Pattern complexity - words with unusual patterns are more complex
+    pattern_score = 0
+    vowels = "AEIOU"
+    consonant_count = 0
+    vowel_count = 0
+    for i, letter in enumerate(word):
+        if letter in vowels:
+            vowel_count += 1
+            consonant_count = 0
+        else:
+            consonant_count += 1
+            vowel_count = 0
+
+        # Penalize consonant clusters of 3+ or vowel clusters of 3+
+        if consonant_count >= 3 or vowel_count >= 3:
+            pattern_score += 1
+
+    # Total score is weighted sum
+    return length_score + letter_score + pattern_score
+
+
+class WordScores(dict):
+    """The word_complexity of words, looked up rather than recomputed by the
+    searches. A word missing from the table is scored on its first lookup."""
+
+    def __missing__(self, word):
+        score = self[word] = word_complexity(word)
+        return score
+
+
+def calculate_redundancy(word_chain):
+    """Redundancy of a chain (lower is better): letter occurrences beyond the first."""
+    # Count each letter's occurrences across all words
+    letter_counts = {}
+    for word in word_chain:
+        for letter in word:
+            letter_counts[letter] = letter_counts.get(letter, 0) + 1
+
+    # Calculate redundancy: sum of occurrences minus 1 for each letter
+    # (since each letter needs to appear at least once)
+    redundancy = sum(max(0, count - 1) for count in letter_counts.values())
+    return redundancy
+
+
+def solution_complexity(word_chain, scores=None):
+    """Complexity of a chain (lower is better - favors simpler solutions).
+    scores (a WordScores) saves recomputing the complexity of each word."""
+    if scores is None:
+        return sum(word_complexity(word) for word in word_chain)
+    return sum(scores[word] for word in word_chain)
+
+
+def select_best_chains(chains, prefer_common_words=True, scores=None):
+    """Keep the chains tied for best: fewest words, then least redundancy, then
+    (if prefer_common_words) lowest complexity. Input order is preserved."""
+    best_chains = []
+    best_key = None
+    for chain in chains:
+        key = (len(chain), calculate_redundancy(chain),
+               solution_complexity(chain, scores) if prefer_common_words else 0)
+        if best_key is None or key < best_key:
+            best_chains = [chain]
+            best_key = key
+        elif key == best_key:
+            best_chains.append(chain)
+    return best_chains
+
+
+def reduce_words(valid_words, bits, prefer_common_words=True, scores=None):
+    """Collapse words that are interchangeable in a chain before searching.
+
+    Words with the same (first letter, last letter, mask) signature are grouped
+    and represented by their shortest (then simplest) member, which scores at
+    least as well as the others in any chain. A group is dropped when another
+    group with the same endpoints covers a strict superset of its letters with a
+    representative that is strictly better: no longer and (if
+    prefer_common_words) no more complex, and shorter or simpler. A representative
+    that only ties is kept, since its chains tie too.
+
+    Returns a dict mapping each representative to its group's words, best first,
+    in the order the representatives appear in valid_words.
+    """
+    scores = scores if scores is not None else WordScores()
+    groups = {}
+    for word in valid_words:
+        groups.setdefault((word[0], word[-1], word_mask(word, bits)), []).append(word)
+
+    def rank(word):
+        return (len(word), scores[word] if prefer_common_words else 0)
+
+    for words in groups.values():
+        words.sort(key=rank)
+
+    by_endpoints = {}
+    for first_letter, last_letter, mask in groups:
+        by_endpoints.setdefault((first_letter, last_letter), []).append(mask)
+
+    reduced = {}
+    for (first_letter, last_letter, mask), words in groups.items():
+        dominated = False
+        for other_mask in by_endpoints[(first_letter, last_letter)]:
+            if other_mask != mask and other_mask & mask == mask:
+                other_rank = rank(groups[(first_letter, last_letter, other_mask)][0])
+                own_rank = rank(words[0])
+                if (other_rank[0] <= own_rank[0] and other_rank[1] <= own_rank[1]
+                        and other_rank != own_rank):
+                    dominated = True
+                    break
+        if not dominated:
+            reduced[words[0]] = words
+
+    # Keep the dictionary order of the representatives for the search
+    return {word: reduced[word] for word in valid_words if word in reduced}
+
+
+class SolveStats:
+    """Counters and phase timings of one solve.
+
+    The search loops keep plain local counts and add them here when they finish,
+    so collecting them costs nothing per node. Phases are timed with phase().
+    """
+
+    def __init__(self, engine=None, shape=False):
+        self.engine = engine
+        self.nodes = 0  # search nodes expanded
+        self.pruned = 0  # nodes cut off by the word-count bound
+        self.candidates = 0  # candidate words scored and sorted
+        self.solutions = 0  # solutions found by the search
+        self.phases = {}  # phase name ('load', 'filter', 'search', 'format') -> seconds
+        # With shape, [nodes, children] per search depth, filled in by the dfs and
+        # dp engines (this one does cost a little per node)
+        self.depths = [] if shape else None
+
+    def add(self, nodes=0, pruned=0, candidates=0, solutions=0):
+        self.nodes += nodes
+        self.pruned += pruned
+        self.candidates += candidates
+        self.solutions += solutions
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def add_depth(self, depth, nodes, children):
+        while len(self.depths) <= depth:
+            self.depths.append([0, 0])
+        self.depths[depth][0] += nodes
+        self.depths[depth][1] += children
+
+    def shape(self):
+        """Return the search tree's nodes, children and branching factor per depth."""
+        return [{'depth': depth, 'nodes': nodes, 'children': children,
+                 'branching': children / nodes if nodes else 0.0}
+                for depth, (nodes, children) in enumerate(self.depths or ())]
+
+    def to_dict(self):
+        stats = {
+            'engine': self.engine,
+            'nodes': self.nodes,
+            'pruned': self.pruned,
+            'candidates': self.candidates,
+            'solutions': self.solutions,
+            'phases': dict(self.phases),
+        }
+        if self.depths is not None:
+            stats['shape'] = self.shape()
+        return stats
+
+
+# Callables run with the SolveStats and the result of every search (see add_stats_listener)
+stats_listeners = []
+
+
+def add_stats_listener(listener):
+    """Call listener(stats, result) after every search run by solve_puzzle_detailed."""
+    stats_listeners.append(listener)
+
+
+class SearchBudget:
+    """Limits on a search and a way to cancel it cooperatively.
+
+    deadline_ms, max_nodes and max_solutions are optional limits; should_stop is
+    an optional callable polled (at most every poll_interval seconds) to cancel
+    the search from outside, e.g. when the client has gone away. Engines charge
+    the nodes they visit with spend() and check exhausted() as they go; once it
+    returns a reason they stop and return the best solutions found so far.
+    """
+
+    def __init__(self, deadline_ms=None, max_nodes=None, max_solutions=None, should_stop=None,
+                 poll_interval=0.05):
+        self.deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms is not None else None
+        self.max_nodes = max_nodes
+        self.max_solutions = max_solutions
+        self.should_stop = should_stop
+        self.poll_interval = poll_interval
+        self.nodes = 0
+        self.solutions = 0
+        self.stopped = None  # 'deadline', 'max_nodes', 'max_solutions' or 'cancelled'
+        self._next_poll = 0.0
+
+    def remaining_ms(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, (self.deadline - time.monotonic()) * 1000)
+
+    def spend(self, nodes=1, solutions=0):
+        self.nodes += nodes
+        self.solutions += solutions
+
+    def share(self, fraction):
+        """Return a budget for part of this search: fraction of the time and nodes
+        left, the same solution limit and cancellation. Charge what it spent back
+        with spend() once that part is done."""
+        remaining_ms = self.remaining_ms()
+        part = SearchBudget(
+            remaining_ms * fraction if remaining_ms is not None else None,
+            int(max(0, self.max_nodes - self.nodes) * fraction) if self.max_nodes is not None else None,
+            max(0, self.max_solutions - self.solutions) if self.max_solutions is not None else None,
+            self.should_stop, self.poll_interval)
+        part.stopped = self.stopped
+        return part
+
+    def cancel(self, reason='cancelled'):
+        if self.stopped is None:
+            self.stopped = reason
+
+    def exhausted(self):
+        """Return why the search must stop, or None while it may go on."""
+        if self.stopped is not None:
+            return self.stopped
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            self.stopped = 'max_nodes'
+        elif self.max_solutions is not None and self.solutions >= self.max_solutions:
+            self.stopped = 'max_solutions'
+        elif self.deadline is not None or self.should_stop is not None:
+            now = time.monotonic()
+            if self.deadline is not None and now >= self.deadline:
+                self.stopped = 'deadline'
+            elif self.should_stop is not None and now >= self._next_poll:
+                self._next_poll = now + self.poll_interval
+                if self.should_stop():
+                    self.stopped = 'cancelled'
+        return self.stopped
+
+
+def iter_chains(valid_words, all_puzzle_letters, max_chain_length=4, prefer_common_words=True,
+                root_slice=None, shared_bound=None, progress_every=10000, budget=None, depths=None,
+                scores=None):
+    """Search for chains like find_chains, yielding events as the search goes.
+
+    Events are dicts with a 'type' (see SolveStats for the counters):
+    - 'solution': a complete chain ('words', 'length', 'redundancy', 'nodes') with
+      a 'status' of 'new' (fewer words than before), 'better' (same number of
+      words, scores better) or 'equivalent' (ties the best so far). 'new' and
+      'better' supersede every earlier solution.
+    - 'progress': every progress_every nodes ('nodes', 'elapsed').
+    - 'finished': last event, with the 'nodes', 'pruned', 'candidates' and 'found'
+      counts; 'solutions' holds the final chains, with each searched
+      representative expanded back into its equivalent words.
+
+    root_slice restricts the search to a slice of the scored first words, and
+    shared_bound (a SharedBound) lets parallel searches prune against each other;
+    see find_chains_parallel. With a SearchBudget the search stops early once the
+    budget is exhausted; the 'finished' event's 'stopped' is then its reason. A
+    SolveStats's depths list, if given, gets the nodes and children per depth.
+    scores (a WordScores) holds the complexity of the words, if already known.
+    """
+    # Letter sets are integer masks over the puzzle letters. Words with a letter
+    # outside the puzzle can never be part of a complete chain, so drop them.
+    bits = letter_bits(all_puzzle_letters)
+    valid_words = [word for word in valid_words if all(letter in bits for letter in word)]
+
+    # Search one representative per group of interchangeable words; the groups
+    # are expanded back out when the solutions are returned.
+    scores = scores if scores is not None else WordScores()
+    word_groups = reduce_words(valid_words, bits, prefer_common_words, scores)
+    valid_words = list(word_groups)
+    word_masks = {word: word_mask(word, bits) for word in valid_words}
+
+    # The parts of the candidate scores below that don't depend on the chain,
+    # computed once per word rather than at every node
+    complexities = {word: scores[word] if prefer_common_words else 0 for word in valid_words}
+
+    # Create a dictionary mapping first letters to (word, mask, static score) entries
     first_letter_map = {}
     for word in valid_words:
         first_letter = word[0]
         if first_letter not in first_letter_map:
             first_letter_map[first_letter] = []
-        first_letter_map[first_letter].append(word)
+        first_letter_map[first_letter].append((word, word_masks[word], -2 * len(word) - complexities[word]))
     
     # Track the best solutions
     best_solutions = []
@@ -98,81 +676,74 @@ def find_chains(valid_words, all_puzzle_letters, max_chain_length=4, prefer_comm
     best_redundancy_score = float('inf')  # Lower is better
     
     # Track progress
-    import time
     start_time = time.time()
     chains_explored = 0
+    pruned = 0
+    candidates = 0
+    found = 0
     
-    # Precompute all_puzzle_letters as a set
-    all_letters_set = set(all_puzzle_letters)
+    # Mask with every puzzle letter set
+    all_letters_mask = (1 << len(bits)) - 1
     
-    # Calculate word complexity score (lower is better - favors common/simple words)
-    # This is a heuristic that generally favors shorter, more common words
-    def word_complexity(word):
-        # Length component - longer words are more complex
-        length_score = len(word) * 0.5
-        
-        # Letter frequency component - rare letters make words more complex
-        rare_letters = "JQXZVBKWYPGFM"
-        common_letters = "ETAOINSRHLDCU"
-        letter_score = 0
-        for letter in word:
-            if letter in rare_letters:
-                letter_score += 2
-            elif letter not in common_letters:
-                letter_score += 1
-        
-        # Pattern complexity - words with unusual patterns are more complex
-        pattern_score = 0
-        vowels = "AEIOU"
-        consonant_count = 0
-        vowel_count = 0
-        for i, letter in enumerate(word):
-            if letter in vowels:
-                vowel_count += 1
-                consonant_count = 0
-            else:
-                consonant_count += 1
-                vowel_count = 0
-                
-            # Penalize consonant clusters of 3+ or vowel clusters of 3+
-            if consonant_count >= 3 or vowel_count >= 3:
-                pattern_score += 1
-        
-        # Total score is weighted sum
-        return length_score + letter_score + pattern_score
+    # The budget and the shared stop flag are checked every check_every chains;
+    # max_nodes is also counted down chain by chain so it is never overshot
+    check_every = 1024
+    stopped = None
+    node_limit = None
+    if budget is not None and budget.max_nodes is not None:
+        node_limit = max(0, budget.max_nodes - budget.nodes)
     
-    # Calculate redundancy score (lower is better)
-    def calculate_redundancy(word_chain):
-        # Count each letter's occurrences across all words
-        letter_counts = {}
-        for word in word_chain:
-            for letter in word:
-                letter_counts[letter] = letter_counts.get(letter, 0) + 1
-        
-        # Calculate redundancy: sum of occurrences minus 1 for each letter
-        # (since each letter needs to appear at least once)
-        redundancy = sum(max(0, count - 1) for count in letter_counts.values())
-        return redundancy
+    def extend(current_chain, used_mask, next_words):
+        for word in next_words:
+            yield current_chain + [word], used_mask | word_masks[word]
     
-    # Calculate solution complexity (lower is better - favors simpler solutions)
-    def solution_complexity(word_chain):
-        return sum(word_complexity(word) for word in word_chain)
+    def depth_counts(depth):
+        while len(depths) <= depth:
+            depths.append([0, 0])
+        return depths[depth]
     
-    # Helper function for DFS
-    def build_chain(current_chain, used_letters):
-        nonlocal chains_explored, best_solution_length, best_redundancy_score
+    def solution_event(status, chain, redundancy_score):
+        nonlocal found
+        found += 1
+        return {'type': 'solution', 'status': status, 'words': chain[:], 'length': len(chain),
+                'redundancy': redundancy_score, 'nodes': chains_explored}
+
+    # Depth-first search with an explicit stack of child iterators, so that
+    # events can be yielded from any depth
+    stack = [iter([([], 0)])]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            continue
+        current_chain, used_mask = node
+        if chains_explored == node_limit:
+            budget.cancel('max_nodes')
+            stopped = budget.stopped
+            break
         chains_explored += 1
+        if depths is not None:
+            depth_counts(len(current_chain))[0] += 1
+
+        # Report progress every progress_every chains
+        if chains_explored % progress_every == 0:
+            yield {'type': 'progress', 'nodes': chains_explored, 'elapsed': time.time() - start_time}
         
-        # Show progress every 10000 chains
-        if chains_explored % 10000 == 0:
-            elapsed = time.time() - start_time
-            print(f"Explored {chains_explored} chains in {elapsed:.2f} seconds...")
+        # Stop early when the budget runs out or the parallel search was stopped
+        if chains_explored % check_every == 0:
+            if budget is not None:
+                budget.spend(check_every)
+                stopped = budget.exhausted()
+            if stopped is None and shared_bound is not None and shared_bound.stopped():
+                stopped = 'cancelled'
+            if stopped is not None:
+                break
         
         # If we've found a solution that uses all letters
-        if used_letters == all_letters_set:
+        if used_mask == all_letters_mask:
             chain_length = len(current_chain)
             redundancy_score = calculate_redundancy(current_chain)
-            complexity_score = solution_complexity(current_chain) if prefer_common_words else 0
+            complexity_score = solution_complexity(current_chain, scores) if prefer_common_words else 0
             
             # If this solution uses fewer words, it's automatically better
             if chain_length < best_solution_length:
@@ -180,8 +751,15 @@ def find_chains(valid_words, all_puzzle_letters, max_chain_length=4, prefer_comm
                 best_solutions.append((current_chain[:], redundancy_score, complexity_score))
                 best_solution_length = chain_length
                 best_redundancy_score = redundancy_score
-                print(f"Found solution with {chain_length} words: {' → '.join(current_chain)} (redundancy: {redundancy_score})")
-                return
+                if shared_bound is not None:
+                    shared_bound.offer(chain_length)
+                yield solution_event('new', current_chain, redundancy_score)
+                if budget is not None:
+                    budget.spend(solutions=1)
+                    stopped = budget.exhausted()
+                    if stopped is not None:
+                        break
+                continue
             
             # If this solution uses the same number of words
             elif chain_length == best_solution_length:
@@ -208,37 +786,52 @@ def find_chains(valid_words, all_puzzle_letters, max_chain_length=4, prefer_comm
                     best_solutions.clear()
                     best_solutions.append((current_chain[:], redundancy_score, complexity_score))
                     best_redundancy_score = redundancy_score
-                    print(f"Found better solution with {chain_length} words: {' → '.join(current_chain)} (redundancy: {redundancy_score})")
+                    yield solution_event('better', current_chain, redundancy_score)
                 elif is_equivalent:
                     # Equivalent solution, add to list
                     best_solutions.append((current_chain[:], redundancy_score, complexity_score))
-                    print(f"Found equivalent solution with {chain_length} words: {' → '.join(current_chain)} (redundancy: {redundancy_score})")
-                return
+                    yield solution_event('equivalent', current_chain, redundancy_score)
+                if budget is not None and (is_better or is_equivalent):
+                    budget.spend(solutions=1)
+                    stopped = budget.exhausted()
+                    if stopped is not None:
+                        break
+                continue
         
         # If we've exceeded our max chain length, stop
         if len(current_chain) >= max_chain_length:
-            return
+            continue
             
         # Optimization: If we can't possibly beat the best solution, stop
-        if best_solution_length < float('inf') and len(current_chain) >= best_solution_length - 1 and used_letters != all_letters_set:
-            return
+        if best_solution_length < float('inf') and len(current_chain) >= best_solution_length - 1 and used_mask != all_letters_mask:
+            pruned += 1
+            continue
+
+        # Nor can chains longer than the best solution of any parallel search.
+        # Unlike the check above this only prunes chains that can't tie it, so
+        # what this search finds doesn't depend on when the others find theirs.
+        if shared_bound is not None and len(current_chain) >= shared_bound.length():
+            pruned += 1
+            continue
         
         # Get the last letter of the current chain's last word
         if not current_chain:
             # Start with any word if the chain is empty
             words_with_scores = []
             for word in valid_words:
-                new_letters = set(word)
                 # Score = (new letters * 5) - complexity
-                score = (len(new_letters) * 5) - (word_complexity(word) if prefer_common_words else 0)
+                score = (popcount(word_masks[word]) * 5) - complexities[word]
                 words_with_scores.append((word, score))
             
             # Sort by score, descending
             words_with_scores.sort(key=lambda x: -x[1])
+            candidates += len(words_with_scores)
+            if root_slice is not None:
+                words_with_scores = words_with_scores[root_slice]
             
-            for word, _ in words_with_scores:
-                new_used_letters = used_letters.union(set(word))
-                build_chain([word], new_used_letters)
+            if depths is not None:
+                depth_counts(0)[1] += len(words_with_scores)
+            stack.append(extend(current_chain, used_mask, [word for word, _ in words_with_scores]))
         else:
             last_letter = current_chain[-1][-1]
             
@@ -247,56 +840,666 @@ def find_chains(valid_words, all_puzzle_letters, max_chain_length=4, prefer_comm
                 # Score words by new letters, redundancy, and complexity
                 next_words = first_letter_map[last_letter]
                 next_words_with_scores = []
+                missing_mask = all_letters_mask & ~used_mask
                 
-                for word in next_words:
+                for word, mask, static_score in next_words:
                     if word not in current_chain:  # Avoid using the same word twice
                         # Calculate how many new letters this word would add
-                        new_letters = set(word) - used_letters
-                        
-                        # Calculate how many redundant letters this word would add
-                        redundant_letters = len(word) - len(new_letters)
+                        new_letters = popcount(mask & missing_mask)
                         
-                        # Word complexity if enabled
-                        complexity = word_complexity(word) if prefer_common_words else 0
-                        
-                        # Score = (new letters * 8) - (redundant letters * 2) - complexity
+                        # Score = (new letters * 8) - (redundant letters * 2) - complexity,
+                        # where redundant letters = length - new letters, so it is
+                        # new letters * 10 plus the static -2 * length - complexity.
                         # This prioritizes words that:
                         # 1. Add more new letters
                         # 2. Minimize redundant letters
                         # 3. Are simpler/more common
-                        score = (len(new_letters) * 8) - (redundant_letters * 2) - complexity
+                        score = new_letters * 10 + static_score
                         
                         # Extra boost if this word would complete the puzzle
-                        missing_letters = all_letters_set - used_letters
-                        if new_letters.issuperset(missing_letters):
+                        if mask & missing_mask == missing_mask:
                             score += 50
                             
                         next_words_with_scores.append((word, score))
                 
                 # Sort by score, descending
                 next_words_with_scores.sort(key=lambda x: -x[1])
+                candidates += len(next_words_with_scores)
                 
-                for word, _ in next_words_with_scores:
-                    new_used_letters = used_letters.union(set(word))
-                    build_chain(current_chain + [word], new_used_letters)
-    
-    # Start the chain-building process
-    build_chain([], set())
-    
-    print(f"Finished exploring {chains_explored} chains in {time.time() - start_time:.2f} seconds")
+                if depths is not None:
+                    depth_counts(len(current_chain))[1] += len(next_words_with_scores)
+                stack.append(extend(current_chain, used_mask, [word for word, _ in next_words_with_scores]))
     
-    # Extract just the word chains from the solutions (strip the scores)
-    return [chain for chain, _, _ in best_solutions]
+    # Extract just the word chains from the solutions (strip the scores) and
+    # expand each representative back into its group of equivalent words
+    chains = []
+    for chain, _, _ in best_solutions:
+        for expanded in itertools.product(*(word_groups[word] for word in chain)):
+            chains.append(list(expanded))
+    if budget is not None:
+        budget.spend(chains_explored % check_every)
+    yield {'type': 'finished', 'nodes': chains_explored, 'pruned': pruned, 'candidates': candidates,
+           'found': found, 'elapsed': time.time() - start_time, 'stopped': stopped,
+           'solutions': select_best_chains(chains, prefer_common_words, scores)}
 
 
-def solve_lb(words, puzzle, max_chain_length=4):
-    puzzle_letters = puzzle[0] + puzzle[1] + puzzle[2] + puzzle[3]
-    words = eliminate_unavailable_letters(words, puzzle_letters)
-    print(f"After eliminating words that contain letters not in puzzle, {len(words)} words left.")
+def find_chains(valid_words, all_puzzle_letters, max_chain_length=4, prefer_common_words=True,
+                root_slice=None, shared_bound=None, budget=None, stats=None, scores=None):
+    """Find chains of words where the last letter of one word is the first letter of the next."""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    messages = {
+        'new': "Found solution",
+        'better': "Found better solution",
+        'equivalent': "Found equivalent solution",
+    }
+    for event in iter_chains(valid_words, all_puzzle_letters, max_chain_length, prefer_common_words,
+                             root_slice, shared_bound, budget=budget,
+                             depths=stats.depths if stats is not None else None, scores=scores):
+        if not debug:
+            continue
+        if event['type'] == 'solution':
+            logger.debug("%s with %d words: %s (redundancy: %d)", messages[event['status']],
+                         event['length'], ' → '.join(event['words']), event['redundancy'])
+        elif event['type'] == 'progress':
+            logger.debug("Explored %d chains in %.2f seconds...", event['nodes'], event['elapsed'])
+    if stats is not None:
+        stats.add(event['nodes'], event['pruned'], event['candidates'], event['found'])
+    if event['stopped'] is not None:
+        logger.debug("Stopped (%s) after exploring %d chains in %.2f seconds",
+                     event['stopped'], event['nodes'], event['elapsed'])
+    else:
+        logger.debug("Finished exploring %d chains in %.2f seconds", event['nodes'], event['elapsed'])
+    return event['solutions']
 
-    for side in puzzle:
-        words = eliminate_consecutives(words, side)
-        print(f"After eliminating for side {side}, there are {len(words)} words left in the dictionary")
+
+class SharedBound:
+    """The fewest words of any solution found so far by several search
+    processes, and a flag to stop them all. Reads are unlocked; updates only ever
+    lower the bound."""
+
+    def __init__(self, max_chain_length):
+        import multiprocessing
+        self._values = multiprocessing.RawArray('i', [max_chain_length + 1, 0])
+        self._lock = multiprocessing.Lock()
+
+    def length(self):
+        return self._values[0]
+
+    def stop(self):
+        self._values[1] = 1
+
+    def stopped(self):
+        return self._values[1] != 0
+
+    def offer(self, length):
+        with self._lock:
+            if length < self._values[0]:
+                self._values[0] = length
+
+
+# Search arguments of a find_chains_parallel worker process, set by its initializer
+_parallel_search = None
+
+
+def _init_parallel_search(valid_words, all_puzzle_letters, max_chain_length, prefer_common_words, shared_bound,
+                          scores):
+    global _parallel_search
+    _parallel_search = (valid_words, all_puzzle_letters, max_chain_length, prefer_common_words, shared_bound,
+                        scores)
+
+
+def _search_unit(unit, units, limits):
+    valid_words, all_puzzle_letters, max_chain_length, prefer_common_words, shared_bound, scores = _parallel_search
+    budget = SearchBudget(*limits) if limits is not None else None
+    stats = SolveStats()
+    chains = find_chains(valid_words, all_puzzle_letters, max_chain_length, prefer_common_words,
+                         root_slice=slice(unit, None, units), shared_bound=shared_bound, budget=budget,
+                         stats=stats, scores=scores)
+    counts = (stats.nodes, stats.pruned, stats.candidates, stats.solutions)
+    return chains, budget.stopped if budget is not None else None, counts
+
+
+# Worker processes used by find_chains_parallel (None: one per CPU)
+SEARCH_WORKERS = int(os.environ.get('LBSOLVER_SEARCH_WORKERS', 0)) or None
+
+
+def find_chains_parallel(valid_words, all_puzzle_letters, max_chain_length=4, prefer_common_words=True,
+                         workers=None, budget=None, stats=None, scores=None):
+    """Run find_chains with its first words split across a process pool.
+
+    The scored first words are dealt round-robin into several work units per
+    worker, so every unit gets a share of the promising ones. The workers prune
+    chains longer than the shortest solution found by any of them (a SharedBound),
+    which can't change the best chains, and the units' solutions are merged in
+    unit order by select_best_chains, so for a given worker count the result is
+    the same from run to run. Other worker counts split the words differently,
+    and the heuristic dfs can then keep different best chains.
+
+    With a SearchBudget each unit gets the remaining deadline and an equal share
+    of the nodes left and of the solution limit; cancelling the budget stops
+    every worker.
+    """
+    from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+
+    workers = workers or SEARCH_WORKERS or os.cpu_count() or 1
+    units = workers * 4
+    shared_bound = SharedBound(max_chain_length)
+    initargs = (list(valid_words), all_puzzle_letters, max_chain_length, prefer_common_words, shared_bound, scores)
+
+    def limits(unit):
+        if budget is None:
+            return None
+        max_nodes = None
+        if budget.max_nodes is not None:
+            # Split what is left exactly, the first units taking the remainder
+            nodes, extra = divmod(max(0, budget.max_nodes - budget.nodes), units)
+            max_nodes = nodes + (unit < extra)
+        return (budget.remaining_ms(), max_nodes,
+                -(-budget.max_solutions // units) if budget.max_solutions is not None else None)
+
+    with ProcessPoolExecutor(workers, initializer=_init_parallel_search, initargs=initargs) as pool:
+        futures = [pool.submit(_search_unit, unit, units, limits(unit)) for unit in range(units)]
+        pending = futures
+        while pending:
+            pending = wait(pending, timeout=0.05, return_when=FIRST_EXCEPTION).not_done
+            if budget is not None and pending and budget.exhausted() is not None:
+                shared_bound.stop()
+        chains = []
+        for future in futures:
+            unit_chains, stopped, counts = future.result()
+            chains.extend(unit_chains)
+            if stats is not None:
+                stats.add(*counts)
+            if budget is not None:
+                budget.spend(counts[0])
+                if stopped is not None:
+                    budget.cancel(stopped)
+    return select_best_chains(chains, prefer_common_words, scores)
+
+
+def rebuild_chains(parents, state):
+    """Return every chain that reaches state, following parents: the (previous
+    state, words) edges into each state, previous being None for a first word.
+    A path through the states may use a word twice, which a chain can't, so
+    such paths are left out."""
+    chains = []
+    for previous, words in parents[state]:
+        prefixes = rebuild_chains(parents, previous) if previous is not None else [[]]
+        for prefix in prefixes:
+            for word in words:
+                if word not in prefix:
+                    chains.append(prefix + [word])
+    return chains
+
+
+def find_chains_dp(valid_words, all_puzzle_letters, max_chain_length=4, prefer_common_words=True,
+                   budget=None, stats=None, scores=None):
+    """Find the chains with the fewest words by breadth-first search over
+    (last letter, covered letters) states.
+
+    There are at most len(letters) * 2**len(letters) states, so the optimal word
+    count is proven in time bounded by states x edges rather than by the number of
+    chains. Every optimal chain is then rebuilt from the parent pointers and the
+    ties are broken like find_chains (redundancy, then complexity). A search
+    stopped by its SearchBudget returns the chains of the layer it was building,
+    which may be none. Its nodes are the states expanded; the pruned ones are the
+    transitions to states already reached with fewer words.
+    """
+    bits = letter_bits(all_puzzle_letters)
+    all_letters_mask = (1 << len(bits)) - 1
+
+    # Words sharing first letter, last letter and letter set lead to the same
+    # state, so each group is a single edge.
+    edges = {}
+    for word in valid_words:
+        if not all(letter in bits for letter in word):
+            continue
+        groups = edges.setdefault(word[0], {})
+        groups.setdefault((word[-1], word_mask(word, bits)), []).append(word)
+
+    # parents maps each state to the (previous state, words) edges that reach it
+    # at its minimum depth; single-word chains have no previous state.
+    parents = {}
+    frontier = []
+    for groups in edges.values():
+        for state, words in groups.items():
+            if state not in parents:
+                parents[state] = []
+                frontier.append(state)
+            parents[state].append((None, words))
+
+    depth = 1
+    expanded = 0
+    pruned = 0
+    if stats is not None and stats.depths is not None:
+        stats.add_depth(0, 1, len(frontier))
+    goals = [state for state in frontier if state[1] == all_letters_mask]
+    while not goals and frontier and depth < max_chain_length:
+        layer = {}
+        if stats is not None and stats.depths is not None:
+            stats.add_depth(depth, len(frontier), sum(len(edges.get(state[0], ())) for state in frontier))
+        for state in frontier:
+            last_letter, used_mask = state
+            next_edges = edges.get(last_letter, {})
+            if budget is not None and budget.exhausted() is not None:
+                break
+            expanded += 1
+            if budget is not None:
+                budget.spend()
+            for (next_last, mask), words in next_edges.items():
+                next_state = (next_last, used_mask | mask)
+                if next_state in parents:
+                    pruned += 1
+                    continue  # Already reached with fewer words
+                if next_state not in layer:
+                    layer[next_state] = []
+                layer[next_state].append((state, words))
+        # A layer cut short by the budget still holds optimal chains: no earlier
+        # layer reached a goal. Only some of their ties may be missing.
+        parents.update(layer)
+        frontier = list(layer)
+        depth += 1
+        goals = [state for state in frontier if state[1] == all_letters_mask]
+        if budget is not None and budget.stopped is not None:
+            break
+
+    chains = []
+    for state in goals:
+        chains.extend(rebuild_chains(parents, state))
+    if stats is not None:
+        stats.add(expanded, pruned, solutions=len(chains))
+    return select_best_chains(chains, prefer_common_words, scores)
+
+
+def find_chains_astar(valid_words, all_puzzle_letters, max_chain_length=4, prefer_common_words=True,
+                      budget=None, stats=None, scores=None):
+    """Find the best chains by best-first (A*) search over (last letter, covered
+    letters) states, ordered by the whole objective rather than the word count.
+
+    A chain's redundancy is its total length minus the number of puzzle letters,
+    so (words, redundancy, complexity) adds up word by word as (1, length,
+    complexity) and the best chains are the cheapest paths to a complete state.
+    States are expanded in order of cost so far plus a lower bound on the cost
+    still to come: the next word can add at most as many new letters as the
+    widest word starting with the last letter, less that shared letter, and every
+    later word at most the widest of all. Since the bound never overestimates,
+    the first complete state popped is optimal, and every state that could tie
+    with it is expanded before the search ends. Words are reduced as in
+    find_chains. A search stopped by its SearchBudget returns the best chains
+    to the complete states reached so far, which may be none.
+    """
+    bits = letter_bits(all_puzzle_letters)
+    all_letters_mask = (1 << len(bits)) - 1
+    letter_count = len(bits)
+    valid_words = [word for word in valid_words if all(letter in bits for letter in word)]
+    scores = scores if scores is not None else WordScores()
+    word_groups = reduce_words(valid_words, bits, prefer_common_words, scores)
+    if not word_groups:
+        return []
+
+    def cost(word):
+        return (1, len(word), scores[word] if prefer_common_words else 0)
+
+    # edges[first letter]: (last letter, mask, cost, words tied at that cost)
+    edges = {}
+    for word, group in word_groups.items():
+        word_cost = cost(word)
+        tied = [other for other in group if cost(other) == word_cost]
+        edges.setdefault(word[0], []).append((word[-1], word_mask(word, bits), word_cost, tied))
+
+    # Most new letters a word starting with each letter can add (its first letter
+    # is the previous word's last, so already covered), and over all letters
+    gain = {letter: max(popcount(mask) for _, mask, _, _ in next_edges) - 1
+            for letter, next_edges in edges.items()}
+    max_gain = max(gain.values())
+    min_length = min(len(word) for word in word_groups)
+    min_complexity = min(cost(word)[2] for word in word_groups)
+
+    def lower_bound(last_letter, used_mask):
+        missing = letter_count - popcount(used_mask)
+        if missing == 0:
+            return (0, 0, 0)
+        if last_letter not in gain:
+            return None  # No word goes on from here
+        rest = missing - gain[last_letter]
+        if rest > 0 and max_gain <= 0:
+            return None
+        words = 1 + max(0, -(-rest // max_gain) if rest > 0 else 0)
+        return (words, max(words * min_length, missing + words), words * min_complexity)
+
+    def add(a, b):
+        return (a[0] + b[0], a[1] + b[1], a[2] + b[2])
+
+    # best[state]: cheapest cost found to reach it; parents[state]: the
+    # (previous state, words) edges reaching it at that cost
+    best = {}
+    parents = {}
+    heap = []
+    counter = itertools.count()
+
+    def push(state, state_cost, previous, words):
+        nonlocal pruned
+        known = best.get(state)
+        if known is not None and state_cost > known:
+            pruned += 1
+            return
+        if known is not None and state_cost == known:
+            parents[state].append((previous, words))
+            return
+        bound = lower_bound(*state)
+        if bound is None or state_cost[0] + bound[0] > max_chain_length:
+            pruned += 1
+            return
+        estimate = add(state_cost, bound)
+        if goal_cost is not None and estimate > goal_cost:
+            pruned += 1
+            return
+        best[state] = state_cost
+        parents[state] = [(previous, words)]
+        heapq.heappush(heap, (estimate, next(counter), state_cost, state))
+
+    expanded = 0
+    pruned = 0
+    candidates = 0
+    goal_cost = None
+    goals = []
+    for next_edges in edges.values():
+        for last_letter, mask, word_cost, words in next_edges:
+            candidates += 1
+            push((last_letter, mask), word_cost, None, words)
+
+    while heap:
+        estimate, _, state_cost, state = heapq.heappop(heap)
+        if goal_cost is not None and estimate > goal_cost:
+            break  # Nothing left can tie the best chains
+        if state_cost != best[state]:
+            continue  # Superseded by a cheaper path
+        last_letter, used_mask = state
+        if used_mask == all_letters_mask:
+            goal_cost = state_cost
+            goals.append(state)
+            continue
+        if budget is not None and budget.exhausted() is not None:
+            # Settle for the complete states reached so far, popped or not
+            goals = [state for state in best if state[1] == all_letters_mask]
+            break
+        expanded += 1
+        if budget is not None:
+            budget.spend()
+        for next_last, mask, word_cost, words in edges.get(last_letter, ()):
+            candidates += 1
+            push((next_last, used_mask | mask), add(state_cost, word_cost), state, words)
+
+    chains = []
+    for state in goals:
+        chains.extend(rebuild_chains(parents, state))
+    if stats is not None:
+        stats.add(expanded, pruned, candidates, solutions=len(chains))
+    return select_best_chains(chains, prefer_common_words, scores)
+
+
+def find_two_word_chains(valid_words, all_puzzle_letters):
+    """Find every complete chain of two words (or of one word, if any exists).
+
+    Words are bucketed by (first letter, mask) and (last letter, mask). For each
+    bucket of words ending in a letter, the words starting with that letter whose
+    masks cover the complement are looked up directly: either by enumerating the
+    supersets of the complement or by scanning that letter's start masks,
+    whichever is fewer.
+    """
+    bits = letter_bits(all_puzzle_letters)
+    all_letters_mask = (1 << len(bits)) - 1
+
+    starts = {}  # (first letter, mask) -> words
+    ends = {}  # (last letter, mask) -> words
+    singles = []
+    for word in valid_words:
+        if not all(letter in bits for letter in word):
+            continue
+        mask = word_mask(word, bits)
+        if mask == all_letters_mask:
+            singles.append([word])
+        starts.setdefault((word[0], mask), []).append(word)
+        ends.setdefault((word[-1], mask), []).append(word)
+    if singles:
+        return singles
+
+    start_masks = {}  # first letter -> masks of the words starting with it
+    for first_letter, mask in starts:
+        start_masks.setdefault(first_letter, []).append(mask)
+
+    chains = []
+    for (last_letter, mask), first_words in ends.items():
+        missing_mask = all_letters_mask & ~mask
+        if 1 << popcount(mask) <= len(start_masks.get(last_letter, ())):
+            # Enumerate missing_mask | sub for every submask sub of mask
+            matches = []
+            sub = mask
+            while True:
+                if (last_letter, missing_mask | sub) in starts:
+                    matches.append(missing_mask | sub)
+                if sub == 0:
+                    break
+                sub = (sub - 1) & mask
+        else:
+            matches = [m for m in start_masks.get(last_letter, ()) if m & missing_mask == missing_mask]
+        for second_mask in matches:
+            for first_word in first_words:
+                for second_word in starts[(last_letter, second_mask)]:
+                    chains.append([first_word, second_word])
+    return chains
+
+
+class _Worst:
+    """Heap entry ordering ranks in reverse, so heapq keeps the worst on top."""
+
+    def __init__(self, rank):
+        self.rank = rank
+
+    def __lt__(self, other):
+        return self.rank > other.rank
+
+
+def _top_chains(words, first_letter_map, all_letters_mask, letter_count, length, k, after, budget=None):
+    """Return the k best chains of exactly length words ranked after after, best first,
+    or None if the budget ran out first.
+
+    A depth-first branch and bound: a partial chain is dropped when the letters
+    still missing can't be reached in the words left, or when a lower bound of its
+    rank (each remaining word adds at least one letter beyond the shared first
+    letter, plus every missing letter) can't beat the worst of the k chains kept.
+    """
+    heap = []
+    min_length = min(info[1] for info in words.values())
+    min_complexity = min(info[2] for info in words.values())
+
+    # reach[r][letter]: every letter some r-word chain starting with letter can use
+    reach = [{}]
+    for _ in range(length):
+        previous = reach[-1]
+        reach.append({letter: functools.reduce(
+            operator.or_, (words[word][0] | previous.get(word[-1], 0) for word in next_words), 0)
+            for letter, next_words in first_letter_map.items() if letter is not None})
+
+    def keep(rank):
+        if after is not None and rank <= after:
+            return
+        if len(heap) < k:
+            heapq.heappush(heap, _Worst(rank))
+        elif rank < heap[0].rank:
+            heapq.heapreplace(heap, _Worst(rank))
+
+    stack = [((), 0, 0, 0.0)]  # (chain, used mask, total length, complexity)
+    check_every = 1024
+    popped = 0
+    node_limit = None
+    if budget is not None and budget.max_nodes is not None:
+        node_limit = max(0, budget.max_nodes - budget.nodes)
+    while stack:
+        if popped == node_limit:
+            budget.spend(popped % check_every)
+            budget.cancel('max_nodes')
+            return None
+        chain, used_mask, total_length, complexity = stack.pop()
+        popped += 1
+        if budget is not None and popped % check_every == 0:
+            budget.spend(check_every)
+            if budget.exhausted():
+                return None
+        remaining = length - len(chain)
+        missing_mask = all_letters_mask & ~used_mask
+        if chain:
+            last = chain[-1][-1]
+            if missing_mask & ~reach[remaining].get(last, 0):
+                continue
+            next_words = first_letter_map.get(last, ())
+        else:
+            next_words = first_letter_map[None]
+
+        if len(heap) == k:
+            missing = letter_count - popcount(used_mask)
+            least_length = total_length + max(remaining * min_length, missing + remaining)
+            bound = (least_length - letter_count, complexity + remaining * min_complexity)
+            if bound > heap[0].rank[1:3]:
+                continue
+
+        if remaining == 1:
+            # The last word must cover every missing letter: rank it here, unpushed
+            for word in next_words:
+                mask, word_length, word_complexity_score = words[word]
+                if mask & missing_mask == missing_mask and word not in chain:
+                    keep((length, total_length + word_length - letter_count,
+                          complexity + word_complexity_score, chain + (word,)))
+            continue
+
+        # Pushed worst first, so the most promising word is searched first
+        for word in reversed(next_words):
+            if word in chain:
+                continue
+            mask, word_length, word_complexity_score = words[word]
+            stack.append((chain + (word,), used_mask | mask, total_length + word_length,
+                          complexity + word_complexity_score))
+    if budget is not None:
+        budget.spend(popped % check_every)
+    return [entry.rank for entry in sorted(heap, key=lambda entry: entry.rank)]
+
+
+def iter_ranked_chains(valid_words, all_puzzle_letters, max_chain_length=4, after=None, page_size=50,
+                       budget=None, scores=None):
+    """Yield every complete chain of up to max_chain_length words in rank order,
+    as (rank, chain) pairs, starting after the rank after. A rank is (word count,
+    redundancy, complexity, words), the words making the order total.
+
+    Unlike the engines this ranks all chains, not just the best ones, so words
+    are not reduced. Chains are found page_size at a time by a bounded branch and
+    bound over each word count in turn, so memory stays O(page_size) however many
+    chains there are. Stops early (setting budget.stopped) if the budget runs out.
+    """
+    scores = scores if scores is not None else WordScores()
+    bits = letter_bits(all_puzzle_letters)
+    all_letters_mask = (1 << len(bits)) - 1
+    words = {}  # word -> (mask, length, complexity)
+    for word in valid_words:
+        if word not in words and all(letter in bits for letter in word):
+            words[word] = (word_mask(word, bits), len(word), scores[word])
+    if not words:
+        return
+
+    # Candidates per first letter (None: any first word), shortest and simplest first
+    order = sorted(words, key=lambda word: (words[word][1], words[word][2], word))
+    first_letter_map = {None: order}
+    for word in order:
+        first_letter_map.setdefault(word[0], []).append(word)
+
+    length = after[0] if after is not None else 1
+    while length <= max_chain_length:
+        page = _top_chains(words, first_letter_map, all_letters_mask, len(bits), length, page_size, after,
+                           budget)
+        if page is None:
+            return
+        for rank in page:
+            yield rank, list(rank[3])
+        if len(page) < page_size:
+            length += 1
+            after = None
+        else:
+            after = page[-1]
+
+
+# Chain-finding engines selectable by solve_puzzle and solve_lb
+ENGINES = {
+    "dfs": find_chains,
+    "dp": find_chains_dp,
+    "parallel": find_chains_parallel,
+    "astar": find_chains_astar,
+}
+DEFAULT_ENGINE = "dp"
+
+
+def get_engine(name):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}'. Choose one of: {', '.join(ENGINES)}")
+    return ENGINES[name]
+
+
+def find_best_chains(valid_words, all_puzzle_letters, max_chain_length=4, prefer_common_words=True,
+                     engine=DEFAULT_ENGINE, budget=None, stats=None, scores=None):
+    """Find the best chains, trying the two-word fast path before the engine.
+
+    With a SearchBudget the engine may stop early; budget.stopped then says why
+    and the chains are the best found so far rather than proven optimal. The
+    engine adds its counters to stats (a SolveStats), if given. scores (a
+    WordScores, e.g. from Dictionary.scored_playable_words) is shared with the
+    engine so that no word's complexity is computed twice.
+    """
+    get_engine(engine)
+    if max_chain_length >= 2:
+        chains = find_two_word_chains(valid_words, all_puzzle_letters)
+        if chains:
+            if stats is not None:
+                stats.add(solutions=len(chains))
+            return select_best_chains(chains, prefer_common_words, scores)
+    return run_engine(engine, valid_words, all_puzzle_letters, max_chain_length, prefer_common_words,
+                      budget=budget, stats=stats, scores=scores)
+
+
+# Share of a search budget run_engine gives an engine other than dfs before it
+# falls back on the dfs
+ENGINE_BUDGET_SHARE = 0.5
+
+
+def run_engine(engine, valid_words, all_puzzle_letters, max_chain_length=4, prefer_common_words=True,
+               budget=None, stats=None, scores=None):
+    """Run the named engine within budget, falling back on the dfs if it runs out.
+
+    The dfs has chains to show as soon as it finds its first one, while dp may
+    stop before its last layer and astar before any complete state, with none.
+    So they get ENGINE_BUDGET_SHARE of the budget, and if they stop with no
+    chains the dfs searches within what is left. budget.stopped then says why
+    the engine stopped.
+    """
+    chain_finder = get_engine(engine)
+    if budget is None or chain_finder is find_chains:
+        return chain_finder(valid_words, all_puzzle_letters, max_chain_length, prefer_common_words,
+                            budget=budget, stats=stats, scores=scores)
+    part = budget.share(ENGINE_BUDGET_SHARE)
+    chains = chain_finder(valid_words, all_puzzle_letters, max_chain_length, prefer_common_words,
+                          budget=part, stats=stats, scores=scores)
+    budget.spend(part.nodes, part.solutions)
+    if part.stopped is None:
+        return chains
+    if not chains and part.stopped != 'cancelled':
+        chains = find_chains(valid_words, all_puzzle_letters, max_chain_length, prefer_common_words,
+                             budget=budget, stats=stats, scores=scores)
+    budget.cancel(part.stopped)
+    return chains
+
+
+def solve_lb(dictionary, puzzle, max_chain_length=4, engine=DEFAULT_ENGINE, filter_mode=None):
+    get_engine(engine)  # Fail early on an unknown engine
+    puzzle_letters = puzzle[0] + puzzle[1] + puzzle[2] + puzzle[3]
+    words, scores = dictionary.scored_playable_words(puzzle, filter_mode)
+    print(f"After eliminating words with letters not in the puzzle or consecutive letters from one side, {len(words)} words left.")
 
     if len(words) == 0:
         print("\nNo valid words found for this puzzle. Please check your input.")
@@ -383,21 +1586,24 @@ def solve_lb(words, puzzle, max_chain_length=4):
         top_words_subset = sorted(filtered_words, key=lambda w: -len(set(w)))[:subset_size]
     
     # Now find chains
-    solutions = find_chains(top_words_subset, puzzle_letters, max_chain_length, prefer_common_words)
+    solutions = find_best_chains(top_words_subset, puzzle_letters, max_chain_length, prefer_common_words, engine,
+                                 scores=scores)
     
     if not solutions and len(filtered_words) < 3000:
         # If no solutions found and dictionary size is manageable, try with all words
         try_all = input("No solutions found with top words. Try with all valid words? (y/n): ").strip().lower()
         if try_all.startswith('y'):
             print("Trying with all valid words...")
-            solutions = find_chains(filtered_words, puzzle_letters, max_chain_length, prefer_common_words)
+            solutions = find_best_chains(filtered_words, puzzle_letters, max_chain_length, prefer_common_words, engine,
+                                         scores=scores)
         
     if not solutions and max_chain_length < 5:
         # If still no solutions, try with all words and one more in the chain
         try_longer = input(f"No solutions found. Try with max chain length of {max_chain_length + 1}? (y/n): ").strip().lower()
         if try_longer.startswith('y'):
             print(f"Trying with max chain length of {max_chain_length + 1}...")
-            solutions = find_chains(filtered_words, puzzle_letters, max_chain_length + 1, prefer_common_words)
+            solutions = find_best_chains(filtered_words, puzzle_letters, max_chain_length + 1, prefer_common_words,
+                                         engine, scores=scores)
     
     if solutions:
         print("\n==== FOUND SOLUTIONS ====")
@@ -549,6 +1755,7 @@ def show_examples():
 
 def main(restart=False):
     import sys
+    global SEARCH_WORKERS
     
     if not restart:
         # Print welcome message
@@ -560,8 +1767,8 @@ def main(restart=False):
         print("of words that use all letters with the fewest possible words.")
 
     try:
-        words = load_dict(DICT_NAME)
-        print(f"{len(words)} words were loaded from the dictionary.")
+        dictionary = get_dictionary()
+        print(f"{len(dictionary)} words were loaded from the dictionary.")
     except FileNotFoundError:
         print(f"Error: Dictionary file '{DICT_NAME}' not found.")
         print("Make sure the file exists in the same directory as this program.")
@@ -570,6 +1777,8 @@ def main(restart=False):
     # Parse command line args (only on first run, not when restarting)
     use_default_puzzle = False
     max_chain_length = 4  # Default value
+    engine = DEFAULT_ENGINE
+    filter_mode = DEFAULT_FILTER_MODE
     show_examples_flag = False
 
     if not restart:
@@ -584,6 +1793,24 @@ def main(restart=False):
                     i += 1  # Skip the next argument
                 except ValueError:
                     print(f"Invalid chain length: {sys.argv[i+1]}. Using default of 4.")
+            elif arg == '--engine' and i+1 < len(sys.argv):
+                if sys.argv[i+1] in ENGINES:
+                    engine = sys.argv[i+1]
+                else:
+                    print(f"Unknown engine: {sys.argv[i+1]}. Using default of {DEFAULT_ENGINE}.")
+                i += 1  # Skip the next argument
+            elif arg == '--workers' and i+1 < len(sys.argv):
+                try:
+                    SEARCH_WORKERS = int(sys.argv[i+1])
+                    i += 1  # Skip the next argument
+                except ValueError:
+                    print(f"Invalid number of workers: {sys.argv[i+1]}. Using one per CPU.")
+            elif arg == '--filter' and i+1 < len(sys.argv):
+                if sys.argv[i+1] in FILTER_MODES:
+                    filter_mode = sys.argv[i+1]
+                else:
+                    print(f"Unknown filter mode: {sys.argv[i+1]}. Using default of {DEFAULT_FILTER_MODE}.")
+                i += 1  # Skip the next argument
             elif arg == '--examples':
                 show_examples_flag = True
             elif arg == '--help' or arg == '-h':
@@ -592,6 +1819,9 @@ def main(restart=False):
                 print("\nOptions:")
                 print("  --use-default      Use the default puzzle")
                 print("  --max-chain N      Set maximum chain length (default: 4)")
+                print(f"  --engine NAME      Chain-finding engine: {', '.join(ENGINES)} (default: {DEFAULT_ENGINE})")
+                print("  --workers N        Worker processes for the parallel engine (default: one per CPU)")
+                print(f"  --filter MODE      Word filter: {', '.join(FILTER_MODES)} (default: {DEFAULT_FILTER_MODE})")
                 print("  --examples         Show example puzzles")
                 print("  --help, -h         Show this help message")
                 return
@@ -613,33 +1843,87 @@ def main(restart=False):
         print("Special commands: 'example', 'help', 'quit'")
         puzzle = get_puzzle()
         
-    solve_lb(words, puzzle, max_chain_length)
+    solve_lb(dictionary, puzzle, max_chain_length, engine, filter_mode)
 
 
-def solve_puzzle(puzzle):
-    """Solve the puzzle and return solutions in a format suitable for the web interface."""
-    print(f"Received puzzle data: {puzzle}")
-    
-    # Get all letters from the puzzle
-    all_letters = ''.join(puzzle)
-    print(f"All letters: {all_letters}")
-    
-    # Load dictionary
-    words = load_dict(DICT_NAME)
-    print(f"Loaded {len(words)} words from dictionary")
-    
-    # Filter words
-    words = eliminate_unavailable_letters(words, all_letters)
-    print(f"After eliminating unavailable letters: {len(words)} words")
-    
-    words = eliminate_consecutives(words, puzzle)  # Pass the puzzle array to check sides
-    print(f"After eliminating consecutives: {len(words)} words")
-    
-    # Find solutions
-    solutions = find_chains(words, all_letters)
-    print(f"Found {len(solutions)} solutions")
-    
-    # Format solutions for web interface
+# Formatted solutions of recently solved puzzles, keyed by (canonical puzzle, engine),
+# in memory and written through to a SQLite store shared by all workers
+solution_cache = lbcache.cache_from_environment()
+solution_store = lbcache.store_from_environment()
+
+# Concurrent solves of the same puzzle share one search
+solve_flights = lbcache.SingleFlight()
+
+# Solver metrics, served by app.py's /metrics
+solve_seconds = lbstats.REGISTRY.histogram(
+    'lbsolver_solve_seconds', 'Time to answer solve_puzzle_detailed, by engine and solution word count',
+    ['engine', 'words'])
+solves_total = lbstats.REGISTRY.counter(
+    'lbsolver_solves_total', 'Solves by engine and outcome (optimal, partial, cached or coalesced)',
+    ['engine', 'outcome'])
+solves_in_flight = lbstats.REGISTRY.gauge('lbsolver_solves_in_flight', 'Solves in progress')
+search_nodes = lbstats.REGISTRY.histogram(
+    'lbsolver_search_nodes', 'Search nodes expanded per search', ['engine'],
+    buckets=(10, 100, 1000, 10000, 100000, 1000000, 10000000))
+search_pruned_total = lbstats.REGISTRY.counter(
+    'lbsolver_search_pruned_total', 'Search nodes cut off by the word-count bound', ['engine'])
+phase_seconds = lbstats.REGISTRY.histogram(
+    'lbsolver_phase_seconds', 'Time spent in each phase of a search', ['phase'])
+lbstats.REGISTRY.gauge(
+    'lbsolver_dictionary_load_seconds', 'Time taken to load the dictionary',
+    function=lambda: _dictionary.load_seconds if _dictionary is not None else 0)
+lbstats.REGISTRY.counter('lbsolver_cache_hits_total', 'Solution cache hits',
+                         function=lambda: solution_cache.hits)
+lbstats.REGISTRY.counter('lbsolver_cache_misses_total', 'Solution cache misses',
+                         function=lambda: solution_cache.misses)
+lbstats.REGISTRY.gauge('lbsolver_cache_hit_ratio', 'Solution cache hits per lookup',
+                       function=lambda: solution_cache.stats()['hit_ratio'])
+lbstats.REGISTRY.gauge('lbsolver_cache_entries', 'Puzzles in the solution cache',
+                       function=lambda: len(solution_cache))
+lbstats.REGISTRY.counter('lbsolver_store_hits_total', 'Solution store hits',
+                         function=lambda: solution_store.hits if solution_store is not None else 0)
+lbstats.REGISTRY.counter('lbsolver_store_misses_total', 'Solution store misses',
+                         function=lambda: solution_store.misses if solution_store is not None else 0)
+lbstats.REGISTRY.counter('lbsolver_coalesced_total', 'Solves that shared a concurrent identical search',
+                         function=lambda: solve_flights.followers)
+
+
+def record_search_metrics(stats, result):
+    search_nodes.observe(stats.nodes, engine=stats.engine)
+    search_pruned_total.inc(stats.pruned, engine=stats.engine)
+    for phase, seconds in stats.phases.items():
+        phase_seconds.observe(seconds, phase=phase)
+
+
+add_stats_listener(record_search_metrics)
+
+# Bump when a change alters the solutions an engine returns, so that stored
+# solutions computed by older code are ignored.
+ENGINE_VERSION = 2
+
+
+def valid_puzzle(puzzle):
+    """Check that puzzle is a list of sides, each a non-empty string of letters A-Z."""
+    return (isinstance(puzzle, list) and len(puzzle) > 0
+            and all(isinstance(side, str) and side.isascii() and side.isalpha() for side in puzzle))
+
+
+def normalize_puzzle(puzzle):
+    """Return puzzle with its sides in upper case, or raise ValueError if it isn't
+    valid_puzzle (the word filters index tables by letter)."""
+    if not valid_puzzle(puzzle):
+        raise ValueError("A puzzle must be a list of sides made of letters")
+    return [side.upper() for side in puzzle]
+
+
+def canonical_puzzle(puzzle):
+    """Return a key that ignores the order of the sides and of the letters within
+    each side: the solutions depend only on how the letters are partitioned."""
+    return tuple(sorted(''.join(sorted(side)) for side in puzzle))
+
+
+def format_solutions(solutions):
+    """Format chains for the web interface."""
     formatted_solutions = []
     for chain in solutions:  # solutions is now just a list of chains
         # Calculate redundancy score
@@ -671,17 +1955,479 @@ def solve_puzzle(puzzle):
     return formatted_solutions
 
 
+def lookup_solutions(puzzle, engine, dictionary):
+    """Return the cached or stored formatted solutions of a puzzle, or None."""
+    canonical = canonical_puzzle(puzzle)
+    cached = solution_cache.get((canonical, engine))
+    if cached is not None:
+        return cached
+    if solution_store is not None:
+        stored = solution_store.get(canonical, engine, ENGINE_VERSION, dictionary.source_hash)
+        if stored is not None:
+            solution_cache.put((canonical, engine), stored)
+            return stored
+    return None
+
+
+def remember_solutions(puzzle, engine, dictionary, formatted_solutions):
+    """Add formatted solutions to the cache and the solution store."""
+    canonical = canonical_puzzle(puzzle)
+    solution_cache.put((canonical, engine), formatted_solutions)
+    if solution_store is not None:
+        solution_store.put(canonical, engine, ENGINE_VERSION, dictionary.source_hash, formatted_solutions)
+
+
+def solve_puzzle(puzzle, engine=DEFAULT_ENGINE, filter_mode=None, use_cache=True):
+    """Solve the puzzle and return solutions in a format suitable for the web interface."""
+    return solve_puzzle_detailed(puzzle, engine, filter_mode, use_cache)['solutions']
+
+
+def solve_puzzle_detailed(puzzle, engine=DEFAULT_ENGINE, filter_mode=None, use_cache=True,
+                          deadline_ms=None, max_nodes=None, max_solutions=None, should_stop=None):
+    """Solve the puzzle within an optional budget (see SearchBudget).
+
+    Returns a dict with the formatted 'solutions' (at most max_solutions), a
+    'status' of 'optimal' when the search finished or 'partial' when it was
+    stopped early, the reason it 'stopped' (or None), the 'nodes' searched, the
+    solve's 'stats' (see SolveStats) and whether the solutions were 'cached' or
+    'coalesced' from a concurrent solve of the same puzzle with the same limits.
+    Only optimal solutions are cached. Raises ValueError for an invalid puzzle.
+    """
+    puzzle = normalize_puzzle(puzzle)
+    start = time.perf_counter()
+    solves_in_flight.inc()
+    try:
+        result = _solve_puzzle_detailed(puzzle, engine, filter_mode, use_cache, deadline_ms,
+                                        max_nodes, max_solutions, should_stop)
+    finally:
+        solves_in_flight.dec()
+    words = len(result['solutions'][0]['words']) if result['solutions'] else 'none'
+    solve_seconds.observe(time.perf_counter() - start, engine=engine, words=words)
+    outcome = 'cached' if result['cached'] else 'coalesced' if result['coalesced'] else result['status']
+    solves_total.inc(engine=engine, outcome=outcome)
+    return result
+
+
+def _solve_puzzle_detailed(puzzle, engine, filter_mode, use_cache, deadline_ms, max_nodes,
+                           max_solutions, should_stop):
+    get_engine(engine)  # Fail early on an unknown engine
+    logger.debug("Received puzzle data: %s", puzzle)
+    stats = SolveStats(engine)
+
+    # Use the shared dictionary (loaded once per process)
+    with stats.phase('load'):
+        dictionary = get_dictionary()
+
+    if not use_cache:
+        return search_puzzle(puzzle, engine, filter_mode, dictionary, deadline_ms, max_nodes,
+                             max_solutions, should_stop, use_cache, stats)
+
+    while True:
+        cached = lookup_solutions(puzzle, engine, dictionary)
+        if cached is not None:
+            return {'solutions': cached[:max_solutions], 'status': 'optimal', 'stopped': None,
+                    'nodes': 0, 'stats': stats.to_dict(), 'cached': True, 'coalesced': False}
+
+        key = (canonical_puzzle(puzzle), engine, deadline_ms, max_nodes, max_solutions)
+        result, shared = solve_flights.do(key, lambda: search_puzzle(
+            puzzle, engine, filter_mode, dictionary, deadline_ms, max_nodes, max_solutions,
+            should_stop, use_cache, stats))
+        if not shared:
+            return result
+        # A search cancelled by its own client is no answer for this one
+        if result['stopped'] == 'cancelled' and not (should_stop and should_stop()):
+            continue
+        return dict(result, solutions=lbcache.copy_solutions(result['solutions']), coalesced=True)
+
+
+def search_puzzle(puzzle, engine, filter_mode, dictionary, deadline_ms=None, max_nodes=None,
+                  max_solutions=None, should_stop=None, use_cache=True, stats=None):
+    """Run the search of solve_puzzle_detailed, bypassing the cache lookup."""
+    stats = stats or SolveStats(engine)
+    budget = SearchBudget(deadline_ms, max_nodes, max_solutions, should_stop)
+
+    # Filter words
+    with stats.phase('filter'):
+        words, scores = dictionary.scored_playable_words(puzzle, filter_mode)
+    logger.debug("%d of %d words are playable", len(words), len(dictionary))
+
+    # Find solutions
+    with stats.phase('search'):
+        solutions = find_best_chains(words, ''.join(puzzle), engine=engine, budget=budget, stats=stats,
+                                     scores=scores)
+
+    # Format solutions for web interface
+    with stats.phase('format'):
+        formatted_solutions = format_solutions(solutions)
+    if use_cache and budget.stopped is None:
+        remember_solutions(puzzle, engine, dictionary, formatted_solutions)
+    result = {
+        'solutions': formatted_solutions[:max_solutions],
+        'status': 'optimal' if budget.stopped is None else 'partial',
+        'stopped': budget.stopped,
+        'nodes': stats.nodes,
+        'stats': stats.to_dict(),
+        'cached': False,
+        'coalesced': False,
+    }
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Solved %s with %s: %d solutions (%s%s), %d nodes, %d pruned, %s",
+                    ' '.join(puzzle), engine, len(solutions), result['status'],
+                    f", {budget.stopped}" if budget.stopped else "", stats.nodes, stats.pruned,
+                    ', '.join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in stats.phases.items()))
+    for listener in stats_listeners:
+        listener(stats, result)
+    return result
+
+
+def encode_cursor(puzzle, rank):
+    """Return an opaque page cursor for the chains of puzzle ranked after rank."""
+    data = [list(canonical_puzzle(puzzle)), rank[0], rank[1], rank[2], list(rank[3])]
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(puzzle, cursor):
+    """Return the rank encoded by encode_cursor, or raise ValueError."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        canonical, length, redundancy, complexity, chain = data
+        rank = (int(length), int(redundancy), float(complexity), tuple(str(word) for word in chain))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from None
+    if tuple(canonical) != canonical_puzzle(puzzle):
+        raise ValueError("The cursor belongs to another puzzle")
+    return rank
+
+
+def solve_puzzle_page(puzzle, limit=10, cursor=None, filter_mode=None, deadline_ms=None, should_stop=None):
+    """Return one page of all the puzzle's solutions in rank order (see iter_ranked_chains).
+
+    Returns a dict with up to limit formatted 'solutions' and a 'next_cursor' to
+    pass back for the following page (None after the last one). When the budget
+    runs out the page is cut short: 'status' is 'partial' and 'stopped' says why,
+    and next_cursor resumes after the last solution returned. Pages are searched,
+    not cached, and only hold limit solutions at a time.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    puzzle = normalize_puzzle(puzzle)
+    after = decode_cursor(puzzle, cursor) if cursor else None
+    dictionary = get_dictionary()
+    budget = SearchBudget(deadline_ms, should_stop=should_stop)
+    words, scores = dictionary.scored_playable_words(puzzle, filter_mode)
+    # One extra chain tells whether there is another page
+    ranked = list(itertools.islice(
+        iter_ranked_chains(words, ''.join(puzzle), after=after, page_size=limit + 1, budget=budget, scores=scores),
+        limit + 1))
+    more = len(ranked) > limit or budget.stopped is not None
+    ranked = ranked[:limit]
+    last = ranked[-1][0] if ranked else after
+    return {
+        'solutions': format_solutions([chain for _, chain in ranked]),
+        'next_cursor': encode_cursor(puzzle, last) if more and last is not None else None,
+        'status': 'optimal' if budget.stopped is None else 'partial',
+        'stopped': budget.stopped,
+        'nodes': budget.nodes,
+    }
+
+
+# cProfile allows one active profiler per process
+_profile_lock = threading.Lock()
+
+
+def profile_solve(puzzle, engine=DEFAULT_ENGINE, filter_mode=None, top=25, deadline_ms=None):
+    """Solve puzzle (bypassing the cache) under cProfile.
+
+    Returns the solve_puzzle_detailed result with a 'profile' holding the top
+    functions by own time ('functions'), the search tree's shape per depth
+    ('shape', for the dfs and dp engines) and the profiled 'seconds'. Raises
+    RuntimeError if another profile is already running.
+    """
+    import cProfile
+    import pstats
+
+    get_engine(engine)  # Fail early on an unknown engine
+    puzzle = normalize_puzzle(puzzle)
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("Another solve is being profiled")
+    try:
+        dictionary = get_dictionary()
+        stats = SolveStats(engine, shape=True)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            result = search_puzzle(puzzle, engine, filter_mode, dictionary, deadline_ms,
+                                   use_cache=False, stats=stats)
+        finally:
+            profiler.disable()
+        seconds = time.perf_counter() - start
+    finally:
+        _profile_lock.release()
+
+    functions = []
+    profile_stats = pstats.Stats(profiler).stats
+    ranked = sorted(profile_stats.items(), key=lambda item: -item[1][2])
+    for (filename, line, name), (_, calls, own, cumulative, _) in ranked[:top]:
+        functions.append({
+            'function': name,
+            'location': f"{os.path.basename(filename)}:{line}" if filename != '~' else 'built-in',
+            'calls': calls,
+            'own_seconds': own,
+            'cumulative_seconds': cumulative,
+        })
+    result['profile'] = {'seconds': seconds, 'functions': functions, 'shape': stats.shape()}
+    return result
+
+
+def format_profile(profile):
+    """Format a profile_solve report as text."""
+    lines = [f"Profiled {profile['seconds'] * 1000:.1f} ms",
+             f"{'own ms':>9} {'cum ms':>9} {'calls':>9}  function"]
+    for function in profile['functions']:
+        lines.append(f"{function['own_seconds'] * 1000:9.1f} {function['cumulative_seconds'] * 1000:9.1f} "
+                     f"{function['calls']:9d}  {function['function']} ({function['location']})")
+    if profile['shape']:
+        lines.append(f"{'depth':>5} {'nodes':>9} {'children':>9} {'branching':>9}")
+        for level in profile['shape']:
+            lines.append(f"{level['depth']:5d} {level['nodes']:9d} {level['children']:9d} {level['branching']:9.2f}")
+    return "\n".join(lines)
+
+
+def iter_solve_events(puzzle, engine=DEFAULT_ENGINE, filter_mode=None, use_cache=True,
+                      deadline_ms=None, max_nodes=None, max_solutions=None, should_stop=None):
+    """Solve the puzzle like solve_puzzle_detailed, yielding events as solutions are found.
+
+    'solution' events carry a formatted solution ('words', 'score') and a status
+    as in iter_chains: 'new' and 'better' replace the solutions so far,
+    'equivalent' adds to them. The dfs engine reports solutions (and 'progress'
+    events) while it searches; the other engines report theirs when they finish.
+    The last event is 'finished', with the final formatted 'solutions' and the
+    'status', 'stopped' and 'stats' fields of solve_puzzle_detailed (the search
+    phase includes the time the consumer spent on the events). Closing the
+    generator abandons the search.
+    """
+    get_engine(engine)  # Fail early on an unknown engine
+    puzzle = normalize_puzzle(puzzle)
+    stats = SolveStats(engine)
+    with stats.phase('load'):
+        dictionary = get_dictionary()
+
+    def solution_events(formatted_solutions):
+        for i, solution in enumerate(formatted_solutions):
+            yield dict(solution, type='solution', status='new' if i == 0 else 'equivalent')
+
+    if use_cache:
+        cached = lookup_solutions(puzzle, engine, dictionary)
+        if cached is not None:
+            cached = cached[:max_solutions]
+            yield from solution_events(cached)
+            yield {'type': 'finished', 'cached': True, 'status': 'optimal', 'stopped': None,
+                   'stats': stats.to_dict(), 'solutions': cached}
+            return
+
+    budget = SearchBudget(deadline_ms, max_nodes, max_solutions, should_stop)
+    all_letters = ''.join(puzzle)
+    with stats.phase('filter'):
+        words, scores = dictionary.scored_playable_words(puzzle, filter_mode)
+    search_start = time.perf_counter()
+    solutions = find_two_word_chains(words, all_letters)
+    if solutions:
+        stats.add(solutions=len(solutions))
+        solutions = select_best_chains(solutions, scores=scores)
+        yield from solution_events(format_solutions(solutions[:max_solutions]))
+    elif engine == "dfs":
+        for event in iter_chains(words, all_letters, progress_every=100000, budget=budget, scores=scores):
+            if event['type'] == 'finished':
+                stats.add(event['nodes'], event['pruned'], event['candidates'], event['found'])
+                solutions = event['solutions']
+                break
+            if event['type'] == 'solution':
+                event['score'] = format_solutions([event['words']])[0]['score']
+            yield event
+    else:
+        solutions = run_engine(engine, words, all_letters, budget=budget, stats=stats, scores=scores)
+        yield from solution_events(format_solutions(solutions[:max_solutions]))
+    stats.phases['search'] = time.perf_counter() - search_start
+
+    with stats.phase('format'):
+        formatted_solutions = format_solutions(solutions)
+    if use_cache and budget.stopped is None:
+        remember_solutions(puzzle, engine, dictionary, formatted_solutions)
+    result = {'type': 'finished', 'cached': False,
+              'status': 'optimal' if budget.stopped is None else 'partial', 'stopped': budget.stopped,
+              'stats': stats.to_dict(), 'solutions': formatted_solutions[:max_solutions]}
+    for listener in stats_listeners:
+        listener(stats, result)
+    yield result
+
+
+# Worker processes used by iter_solve_batch (None: one per CPU)
+BATCH_WORKERS = int(os.environ.get('LBSOLVER_BATCH_WORKERS', 0)) or None
+
+# This process's pool for iter_solve_batch, and the process that started it
+_batch_executor = None
+_batch_pid = None
+
+
+def _batch_pool():
+    # Pools don't survive a fork, so each (gunicorn worker) process starts its own.
+    # Forking a process that already runs threads can deadlock the child, so its
+    # processes come from a fork server (or are spawned where there is none).
+    global _batch_executor, _batch_pid
+    if _batch_executor is None or _batch_pid != os.getpid():
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        _batch_executor = ProcessPoolExecutor(BATCH_WORKERS or os.cpu_count() or 1,
+                                              mp_context=multiprocessing.get_context(method))
+        _batch_pid = os.getpid()
+    return _batch_executor
+
+
+@atexit.register
+def _shutdown_batch_pool():
+    # Only the process that started the pool owns its workers
+    if _batch_executor is not None and _batch_pid == os.getpid():
+        _batch_executor.shutdown(cancel_futures=True)
+
+
+def _search_batch_puzzle(words, all_puzzle_letters, engine, deadline):
+    """Search one puzzle of a batch in a pool process; deadline is a time.time() or None."""
+    remaining_ms = None
+    if deadline is not None:
+        remaining_ms = (deadline - time.time()) * 1000
+        if remaining_ms <= 0:
+            return [], 'deadline', 0
+    budget = SearchBudget(remaining_ms)
+    stats = SolveStats(engine)
+    chains = find_best_chains(words, all_puzzle_letters, engine=engine, budget=budget, stats=stats)
+    return chains, budget.stopped, stats.nodes
+
+
+def iter_solve_batch(puzzles, engine=DEFAULT_ENGINE, deadline_ms=None, filter_mode=None):
+    """Solve many puzzles, yielding (indices, result) for each distinct puzzle when it is ready.
+
+    Puzzles with the same canonical form are solved once and reported together
+    (indices are their positions in puzzles). Cached puzzles come first; the
+    others are filtered here, sharing the candidate words of boards with the
+    same letters, and searched on a process pool, in completion order.
+    deadline_ms bounds the whole batch. A result has the 'solutions', 'status',
+    'stopped' and 'cached' fields of solve_puzzle_detailed, or an 'error'.
+    """
+    from concurrent.futures import as_completed
+
+    get_engine(engine)  # Fail early on an unknown engine
+    # The batch is already spread over processes, so run the parallel engine's search in each
+    search_engine = "dfs" if engine == "parallel" else engine
+    dictionary = get_dictionary()
+    deadline = time.time() + deadline_ms / 1000 if deadline_ms is not None else None
+
+    groups = {}  # canonical puzzle -> (puzzle, indices)
+    for i, puzzle in enumerate(puzzles):
+        try:
+            puzzle = normalize_puzzle(puzzle)
+        except ValueError as e:
+            yield [i], {'error': str(e)}
+            continue
+        groups.setdefault(canonical_puzzle(puzzle), (puzzle, []))[1].append(i)
+
+    vector = (filter_mode or DEFAULT_FILTER_MODE) == "vector"
+    candidates = {}  # sorted letters -> ids of the words using only those letters
+    futures = {}
+    try:
+        for puzzle, indices in groups.values():
+            cached = lookup_solutions(puzzle, engine, dictionary)
+            if cached is not None:
+                yield indices, {'solutions': cached, 'status': 'optimal', 'stopped': None, 'cached': True}
+                continue
+            if vector:
+                letters = ''.join(sorted(''.join(puzzle)))
+                if letters not in candidates:
+                    candidates[letters] = dictionary.candidate_ids(letters)
+                words = dictionary.words_for_ids(dictionary.playable_ids(puzzle, candidates[letters]).tolist())
+            else:
+                words = dictionary.playable_words(puzzle, filter_mode)
+            future = _batch_pool().submit(_search_batch_puzzle, words, ''.join(puzzle), search_engine, deadline)
+            futures[future] = (puzzle, indices)
+
+        for future in as_completed(futures):
+            puzzle, indices = futures[future]
+            try:
+                chains, stopped, nodes = future.result()
+            except Exception as e:
+                yield indices, {'error': str(e)}
+                continue
+            formatted_solutions = format_solutions(chains)
+            if stopped is None:
+                remember_solutions(puzzle, engine, dictionary, formatted_solutions)
+            yield indices, {'solutions': formatted_solutions,
+                            'status': 'optimal' if stopped is None else 'partial',
+                            'stopped': stopped, 'nodes': nodes, 'cached': False}
+    finally:
+        # If the consumer gave up, don't leave the rest of the batch queued
+        for future in futures:
+            future.cancel()
+
+
+def read_puzzles(lines):
+    """Parse puzzles, one per line with the sides separated by spaces (e.g.
+    "LEI XYS CUV KOT"). Blank lines and lines starting with # are skipped."""
+    puzzles = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            puzzles.append(line.upper().split())
+    return puzzles
+
+
+def warm_store(puzzles, engine=DEFAULT_ENGINE):
+    """Solve puzzles so that their solutions are written to the solution store."""
+    if solution_store is None:
+        raise ValueError("The solution store is disabled (LBSOLVER_STORE is empty)")
+    for puzzle in puzzles:
+        solutions = solve_puzzle(puzzle, engine)
+        print(f"Stored {' '.join(puzzle)}: {len(solutions)} solutions")
+    print(f"{len(solution_store)} puzzles in {solution_store.path}")
+
+
 if __name__ == '__main__':
     import argparse
+    import sys
     parser = argparse.ArgumentParser()
     parser.add_argument('--use-default', action='store_true', help='Use the default puzzle')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default=DEFAULT_ENGINE, help='Chain-finding engine')
+    parser.add_argument('--filter', choices=FILTER_MODES, default=DEFAULT_FILTER_MODE, help='Word filter')
+    parser.add_argument('--workers', type=int, help='Worker processes for the parallel engine (default: one per CPU)')
+    parser.add_argument('--warm-store', nargs='?', const='', metavar='FILE',
+                        help='Pre-solve the example puzzles (or the puzzles in FILE, one per line) into the solution store')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the solve and print the hottest functions and the search tree shape')
+    parser.add_argument('--log-level', default=LOG_LEVEL, type=str.upper,
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help='Level of the solver log messages')
     args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format='%(message)s')
+    if args.workers:
+        SEARCH_WORKERS = args.workers
+
+    if args.warm_store is not None:
+        if args.warm_store:
+            with open(args.warm_store) as f:
+                warm_store(read_puzzles(f), args.engine)
+        else:
+            warm_store(EXAMPLE_PUZZLES, args.engine)
+        sys.exit(0)
     
     if args.use_default:
         puzzle = DEFAULT_PUZZLE
     else:
         puzzle = input("Enter puzzle (4x4 grid of letters): ").strip().split()
     
-    solutions = solve_puzzle(puzzle)
+    if args.profile:
+        result = profile_solve(puzzle, args.engine, args.filter)
+        print(format_profile(result['profile']))
+        solutions = result['solutions']
+    else:
+        solutions = solve_puzzle(puzzle, args.engine, args.filter)
     for solution in solutions:
         print(f"Solution: {' → '.join(solution['words'])} (Score: {solution['score']})")
@@ -0,0 +1,164 @@
+"""Process metrics in the Prometheus text exposition format.
+
+A small stand-in for prometheus_client: counters, gauges and histograms with
+labels, kept in a Registry that renders them for a /metrics endpoint. Values are
+per process, so with several gunicorn workers each scrape sees one worker.
+"""
+
+import math
+import threading
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metric:
+    """Base class: a named family of values, one per combination of label values.
+
+    With function, the metric has a single unlabelled value read from it at each
+    scrape, for values another object already keeps (e.g. a cache's hit count).
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labels=(), function=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.function = function
+        self._values = {}  # label values -> value
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes the labels {', '.join(self.labels) or '(none)'}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self):
+        """Yield (name, label text, value) for every sample of the metric."""
+        if self.function is not None:
+            yield self.name, "", self.function()
+            return
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, format_labels(self.labels, key), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+# Default latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0]  # per bucket, then sum
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts)) for key, counts in self._values.items()]
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield (f"{self.name}_bucket",
+                       format_labels(self.labels, key, [('le', format_value(bound))]), cumulative)
+            yield f"{self.name}_sum", format_labels(self.labels, key), counts[-1]
+            yield f"{self.name}_count", format_labels(self.labels, key), cumulative
+
+
+class Registry:
+    """The metrics exposed together by one endpoint."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"A metric named {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=(), function=None):
+        return self.register(Counter(name, documentation, labels, function))
+
+    def gauge(self, name, documentation, labels=(), function=None):
+        return self.register(Gauge(name, documentation, labels, function))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """Return every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() + "\n" for metric in metrics)
+
+
+# Content type of Registry.render's output
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# The registry served by app.py's /metrics
+REGISTRY = Registry()
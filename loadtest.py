@@ -0,0 +1,229 @@
+"""Load-test the web service end to end.
+
+    python loadtest.py --concurrency 8 --duration 30
+    python loadtest.py --rate 5 --hot-fraction 0.9 --workers 2
+
+Starts gunicorn (as render.yaml does) on a local port, unless --url points at a
+running server, and drives POST /solve either from --concurrency clients sending
+back to back or, with --rate, with Poisson arrivals at that many requests per
+second. Puzzles are drawn from a small hot set (repeated, like a daily puzzle)
+with probability --hot-fraction and are otherwise unique random boards. Reports
+throughput, latency percentiles, error and timeout rates and the RSS of the
+gunicorn processes over time, against --memory-limit (512 MB, as on Render's
+free tier).
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from lbbench import random_puzzle
+from lbsolver import EXAMPLE_PUZZLES
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of values (fraction in [0, 1])."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))]
+
+
+def process_tree(pid):
+    """Return pid and the ids of all its descendants, from /proc."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    pids = [pid]
+    for current in pids:
+        pids.extend(children.get(current, ()))
+    return pids
+
+
+def rss_bytes(pid):
+    """Return the resident set size of a process, or 0 if it is gone."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+class LoadTest:
+    def __init__(self, url, puzzles, hot_fraction=0.5, timeout=30.0, engine=None, seed=1):
+        self.url = url.rstrip('/')
+        self.hot = puzzles
+        self.unique_rng = random.Random(seed + 1)
+        self.hot_fraction = hot_fraction
+        self.timeout = timeout
+        self.engine = engine
+        self.rng = random.Random(seed)
+        self.results = []  # (start time, seconds, outcome) with outcome 'ok', 'error' or 'timeout'
+        self.memory = []  # (time, {pid: rss})
+        self._lock = threading.Lock()
+
+    def next_puzzle(self):
+        with self._lock:
+            if self.rng.random() < self.hot_fraction:
+                return self.rng.choice(self.hot)
+            return random_puzzle(self.unique_rng)
+
+    def request(self):
+        body = {'puzzle': self.next_puzzle()}
+        if self.engine:
+            body['engine'] = self.engine
+        request = urllib.request.Request(f'{self.url}/solve', data=json.dumps(body).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        start = time.monotonic()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                outcome = 'ok' if json.load(response).get('success') else 'error'
+        except urllib.error.HTTPError:
+            outcome = 'error'
+        except (TimeoutError, OSError) as e:
+            timed_out = isinstance(e, TimeoutError) or 'timed out' in str(e)
+            outcome = 'timeout' if timed_out else 'error'
+        with self._lock:
+            self.results.append((start, time.monotonic() - start, outcome))
+
+    def run_closed(self, concurrency, deadline):
+        """Each of concurrency clients sends its next request when the last one returns."""
+        def client():
+            while time.monotonic() < deadline:
+                self.request()
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_open(self, rate, deadline):
+        """Send requests with exponentially distributed gaps, whether or not earlier ones returned."""
+        threads = []
+        next_time = time.monotonic()
+        while next_time < deadline:
+            time.sleep(max(0.0, next_time - time.monotonic()))
+            thread = threading.Thread(target=self.request, daemon=True)
+            thread.start()
+            threads.append(thread)
+            next_time += self.rng.expovariate(rate)
+        for thread in threads:
+            thread.join(self.timeout)
+
+    def sample_memory(self, pid, stop, interval=1.0):
+        while not stop.wait(interval):
+            self.memory.append((time.monotonic(), {p: rss_bytes(p) for p in process_tree(pid)}))
+
+    def report(self, started, finished, memory_limit):
+        latencies = [seconds for _, seconds, outcome in self.results if outcome == 'ok']
+        count = len(self.results)
+        errors = sum(outcome == 'error' for _, _, outcome in self.results)
+        timeouts = sum(outcome == 'timeout' for _, _, outcome in self.results)
+        totals = [sum(sample.values()) for _, sample in self.memory]
+        report = {
+            'requests': count,
+            'seconds': finished - started,
+            'throughput': len(latencies) / (finished - started),
+            'error_rate': errors / count if count else 0.0,
+            'timeout_rate': timeouts / count if count else 0.0,
+            'latency': {name: percentile(latencies, fraction)
+                        for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))},
+            'rss_peak': max(totals, default=None),
+            'rss_over_limit': bool(totals) and max(totals) > memory_limit,
+            'rss': [(round(at - started, 1), total) for (at, _), total in zip(self.memory, totals)],
+        }
+        return report
+
+
+def start_gunicorn(port, workers, timeout):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--preload', '--workers', str(workers), '--timeout', str(timeout),
+         '--bind', f'127.0.0.1:{port}', 'app:app'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(600):
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f'{url}/healthz', timeout=1) as response:
+                if response.status == 200:
+                    return process, url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("gunicorn did not become ready within 60 seconds")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', help='Test a running server instead of starting gunicorn')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers')
+    parser.add_argument('--worker-timeout', type=int, default=30, help='gunicorn --timeout')
+    parser.add_argument('--concurrency', type=int, default=4, help='Clients for a closed-loop test')
+    parser.add_argument('--rate', type=float, help='Requests per second for an open-loop test')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to send requests for')
+    parser.add_argument('--hot-fraction', type=float, default=0.5, help='Share of requests for the hot puzzles')
+    parser.add_argument('--engine', help='Engine requested from /solve (default: the server default)')
+    parser.add_argument('--timeout', type=float, default=30, help='Client timeout per request, in seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--memory-limit', type=float, default=512, help='Instance memory, in MB')
+    parser.add_argument('--output', help='Write the report to this JSON file')
+    args = parser.parse_args(argv)
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_gunicorn(args.port, args.workers, args.worker_timeout)
+    test = LoadTest(url, [list(puzzle) for puzzle in EXAMPLE_PUZZLES], args.hot_fraction,
+                    args.timeout, args.engine, args.seed)
+    stop = threading.Event()
+    if process is not None:
+        threading.Thread(target=test.sample_memory, args=(process.pid, stop), daemon=True).start()
+    try:
+        started = time.monotonic()
+        if args.rate:
+            test.run_open(args.rate, started + args.duration)
+        else:
+            test.run_closed(args.concurrency, started + args.duration)
+        finished = time.monotonic()
+    finally:
+        stop.set()
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = test.report(started, finished, args.memory_limit * 1024 * 1024)
+    latency = report['latency']
+    print(f"{report['requests']} requests in {report['seconds']:.1f} s: {report['throughput']:.2f} ok/s, "
+          f"{report['error_rate']:.1%} errors, {report['timeout_rate']:.1%} timeouts")
+    if latency['p50'] is not None:
+        print("latency " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in latency.items()))
+    if report['rss_peak'] is not None:
+        print(f"peak RSS {report['rss_peak'] / 1e6:.0f} MB"
+              + (f" (over the {args.memory_limit:.0f} MB limit)" if report['rss_over_limit'] else ""))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,9 @@
 
+import os
+import sys
+
+from lbindex import INDEX_NAME, index_is_current, write_index
+from lbsolver import COMPLEXITY_VERSION, word_complexity
 
 DICT_NAME = "dictionary.txt"
 OUTPUT_NAME = "lbwords.txt"
@@ -14,5 +19,29 @@ def filter_dict(input, output):
         for word in lb_words:
             outfile.write(word)
 
+
+def compile_index(input, output):
+    """Compile the filtered word list into the binary index lbsolver.py maps at startup."""
+    with open(input, 'r') as infile:
+        words = [word.strip() for word in infile]
+    write_index(words, input, output, complexity=word_complexity, complexity_version=COMPLEXITY_VERSION)
+    return len(words)
+
+
+def build(force=False):
+    """Rebuild only the stages whose inputs changed: dictionary.txt -> lbwords.txt -> lbwords.idx."""
+    if force or not os.path.exists(OUTPUT_NAME) or os.path.getmtime(OUTPUT_NAME) < os.path.getmtime(DICT_NAME):
+        filter_dict(DICT_NAME, OUTPUT_NAME)
+        print(f"Filtered {DICT_NAME} into {OUTPUT_NAME}")
+    else:
+        print(f"{OUTPUT_NAME} is up to date")
+
+    if force or not index_is_current(INDEX_NAME, OUTPUT_NAME, COMPLEXITY_VERSION):
+        count = compile_index(OUTPUT_NAME, INDEX_NAME)
+        print(f"Compiled {count} words into {INDEX_NAME}")
+    else:
+        print(f"{INDEX_NAME} is up to date")
+
+
 if __name__ == '__main__':
-   filter_dict(DICT_NAME, OUTPUT_NAME)
\ No newline at end of file
+   build(force='--force' in sys.argv[1:])
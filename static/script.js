@@ -3,6 +3,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const clearBtn = document.getElementById('clearBtn');
     const resultsDiv = document.getElementById('results');
     const solutionsList = document.getElementById('solutionsList');
+    const moreBtn = document.getElementById('moreBtn');
     const letterInputs = document.querySelectorAll('.letter-input');
 
     console.log('DOM loaded, found elements:', {
@@ -13,6 +14,11 @@ document.addEventListener('DOMContentLoaded', function() {
         letterInputs: letterInputs.length
     });
 
+    // The solved puzzle and the solutions shown, for paging through the rest
+    let currentPuzzle = null;
+    let shownSolutions = [];
+    let nextCursor = null;
+
     // Focus on the first input field
     letterInputs[0].focus();
 
@@ -26,6 +32,7 @@ document.addEventListener('DOMContentLoaded', function() {
         // Clear solutions
         solutionsList.innerHTML = '';
         resultsDiv.classList.add('d-none');
+        moreBtn.classList.add('d-none');
         
         // Focus back on first input
         letterInputs[0].focus();
@@ -57,6 +64,58 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    function renderSolutions(solutions) {
+        solutionsList.innerHTML = '';
+        solutions.forEach(solution => {
+            const solutionDiv = document.createElement('div');
+            solutionDiv.className = 'list-group-item solution-item';
+            solutionDiv.innerHTML = `
+                <div class="solution-words">${solution.words.join(' → ')}</div>
+                <div class="solution-score">Score: ${solution.score}</div>
+            `;
+            solutionsList.appendChild(solutionDiv);
+        });
+        shownSolutions = solutions;
+        resultsDiv.classList.remove('d-none');
+    }
+
+    // Show 10 more of all the solutions, best first. The first pages cover the
+    // best solutions already shown, so they replace the list and later pages add to it
+    moreBtn.addEventListener('click', async function() {
+        moreBtn.disabled = true;
+        try {
+            const wanted = shownSolutions.length + 10;
+            let solutions = nextCursor ? shownSolutions : [];
+            let cursor = nextCursor;
+            do {
+                const body = cursor
+                    ? { puzzle: currentPuzzle, limit: 10, cursor: cursor }
+                    : { puzzle: currentPuzzle, limit: 10 };
+                const response = await fetch('/solve', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify(body),
+                });
+                const data = await response.json();
+                if (!data.success) {
+                    throw new Error(data.error);
+                }
+                solutions = solutions.concat(data.solutions);
+                cursor = data.next_cursor;
+            } while (cursor && solutions.length < wanted);
+            renderSolutions(solutions);
+            nextCursor = cursor;
+            moreBtn.classList.toggle('d-none', !nextCursor);
+        } catch (error) {
+            console.error('Error fetching more solutions:', error);
+            alert('Error fetching more solutions: ' + error.message);
+        } finally {
+            moreBtn.disabled = false;
+        }
+    });
+
     solveBtn.addEventListener('click', async function() {
         console.log('Solve button clicked');
         
@@ -74,7 +133,9 @@ document.addEventListener('DOMContentLoaded', function() {
         solveBtn.disabled = true;
         solveBtn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> Solving...';
         resultsDiv.classList.add('d-none');
+        moreBtn.classList.add('d-none');
         solutionsList.innerHTML = '';
+        nextCursor = null;
 
         try {
             // Convert letters array to the format expected by the solver
@@ -86,8 +147,10 @@ document.addEventListener('DOMContentLoaded', function() {
             ];
 
             console.log('Formatted puzzle data:', puzzle);
+            currentPuzzle = puzzle;
 
-            const response = await fetch('/solve', {
+            // Stream solutions as the solver finds them (one JSON event per line)
+            const response = await fetch('/solve/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -96,27 +159,42 @@ document.addEventListener('DOMContentLoaded', function() {
             });
 
             console.log('Response status:', response.status);
-            const data = await response.json();
-            console.log('Response data:', data);
-
-            if (data.success) {
-                console.log('Success! Number of solutions:', data.solutions.length);
-                // Display solutions
-                data.solutions.forEach((solution, index) => {
-                    console.log(`Solution ${index + 1}:`, solution);
-                    const solutionDiv = document.createElement('div');
-                    solutionDiv.className = 'list-group-item solution-item';
-                    solutionDiv.innerHTML = `
-                        <div class="solution-words">${solution.words.join(' → ')}</div>
-                        <div class="solution-score">Score: ${solution.score}</div>
-                    `;
-                    solutionsList.appendChild(solutionDiv);
-                });
+            if (!response.ok) {
+                // Invalid requests are answered with a plain JSON error, not a stream
+                const data = await response.json().catch(() => ({}));
+                throw new Error(data.error || `Server responded with ${response.status}`);
+            }
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let solutions = [];
+
+            const handleEvent = (event) => {
+                if (event.type === 'solution') {
+                    // 'new' and 'better' solutions replace the list, 'equivalent' ones add to it
+                    solutions = event.status === 'equivalent' ? solutions.concat([event]) : [event];
+                    renderSolutions(solutions);
+                } else if (event.type === 'finished') {
+                    console.log('Finished! Number of solutions:', event.solutions.length);
+                    renderSolutions(event.solutions);
+                    moreBtn.classList.toggle('d-none', event.solutions.length === 0);
+                } else if (event.type === 'error') {
+                    throw new Error(event.error);
+                }
+            };
 
-                resultsDiv.classList.remove('d-none');
-            } else {
-                console.error('Error from server:', data.error);
-                alert('Error: ' + data.error);
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+            }
+            if (buffer.trim()) {
+                handleEvent(JSON.parse(buffer));
             }
         } catch (error) {
             console.error('Error during solve:', error);
@@ -0,0 +1,79 @@
+"""Regression tests: the exact engines must agree with a brute-force search.
+
+Run with `python -m pytest` from the repository root (needs lbwords.txt).
+"""
+
+import functools
+
+import pytest
+
+import lbsolver
+
+# Boards whose best chains the engines once got wrong, or that need 3 words
+BOARDS = [
+    "ACH WVL ENT IYR",
+    "AIF TOB HDW YEL",
+    "PEO FNH IAD RGC",
+    "RFL NAW OCS IVT",
+]
+
+
+@functools.lru_cache(maxsize=None)
+def playable(board):
+    puzzle = board.split()
+    words, scores = lbsolver.get_dictionary().scored_playable_words(puzzle, None)
+    return words, scores, ''.join(puzzle)
+
+
+@functools.lru_cache(maxsize=None)
+def brute_force(board, max_chain_length=4):
+    """Every chain with the fewest words, found by trying all chains of each length."""
+    words, _, letters = playable(board)
+    bits = lbsolver.letter_bits(letters)
+    all_letters_mask = (1 << len(bits)) - 1
+    masks = {word: lbsolver.word_mask(word, bits) for word in words}
+    by_first_letter = {}
+    for word in words:
+        by_first_letter.setdefault(word[0], []).append(word)
+
+    for length in range(1, max_chain_length + 1):
+        found = []
+
+        def extend(chain, used_mask):
+            next_words = by_first_letter.get(chain[-1][-1], ()) if chain else words
+            if len(chain) == length - 1:
+                found.extend(chain + [word] for word in next_words
+                             if used_mask | masks[word] == all_letters_mask and word not in chain)
+                return
+            for word in next_words:
+                if word not in chain:
+                    extend(chain + [word], used_mask | masks[word])
+
+        extend([], 0)
+        if found:
+            return found
+    return []
+
+
+def best_chains(board, prefer_common_words):
+    _, scores, _ = playable(board)
+    return sorted(lbsolver.select_best_chains(brute_force(board), prefer_common_words, scores))
+
+
+@pytest.mark.parametrize("prefer_common_words", [True, False])
+@pytest.mark.parametrize("engine", ["dp", "astar"])
+@pytest.mark.parametrize("board", BOARDS)
+def test_engine_finds_every_best_chain(board, engine, prefer_common_words):
+    words, scores, letters = playable(board)
+    chains = lbsolver.ENGINES[engine](words, letters, prefer_common_words=prefer_common_words, scores=scores)
+    assert sorted(chains) == best_chains(board, prefer_common_words)
+
+
+@pytest.mark.parametrize("prefer_common_words", [True, False])
+@pytest.mark.parametrize("board", BOARDS)
+def test_reduce_words_keeps_every_best_chain(board, prefer_common_words):
+    words, scores, letters = playable(board)
+    groups = lbsolver.reduce_words(words, lbsolver.letter_bits(letters), prefer_common_words, scores)
+    kept = {word for group in groups.values() for word in group}
+    for chain in best_chains(board, prefer_common_words):
+        assert set(chain) <= kept, chain